@@ -10,14 +10,79 @@ Funciones principales:
 - escribir_archivo(nombre, contenido)
 - borrar_archivo(nombre)
 - formatear_disco()
+- info_archivo(nombre) / listar_archivos_detalle()
+- estadisticas_bloqueo()
+- estadisticas_compresion()
+- exportar_indice() / cargar_indice(entries) (para instantáneas)
 
+Concurrencia: el disco se mantiene en memoria como un índice (nombre -> contenido) protegido
+por un lock lectores/escritores, así que listar/leer corren en paralelo. Cada archivo tiene
+además un lock (uno de FILE_LOCKS, elegido por hash del nombre): dos escrituras al mismo
+archivo se serializan, pero escrituras a archivos distintos casi siempre solo comparten el
+instante en que actualizan el índice. El volcado a
+`disco_virtual.txt` se agrupa: si varias escrituras llegan juntas, un solo volcado las persiste.
+
+Compresión: el contenido puede guardarse comprimido (zlib o lzma de la biblioteca estándar)
+de forma transparente para leer_archivo. Una entrada comprimida se guarda como
+`~<codec>~<tamaño_lógico>~<base64>`; un contenido normal que empiece por `~` y pueda
+confundirse se guarda escapado como `~raw~<contenido>`. Por defecto solo se comprimen
+archivos de al menos COMPRESION_UMBRAL bytes y solo si el resultado ocupa menos.
+Un contenido sin comprimir con saltos de línea se guarda como `~esc~<contenido escapado>`
+(unicode_escape), porque el disco tiene una entrada por línea.
 """
+import base64
+import os
+import re
+import time
+import zlib
 from pathlib import Path
-from typing import List, Optional
+from typing import Callable, Dict, List, Optional, Tuple
 import threading
 
+try:
+    import lzma
+except ImportError:  # algunas compilaciones de Python no incluyen lzma
+    lzma = None
+
+import metricas
+from sincronizacion import LockLectoresEscritores
+
 DISCO_PATH = Path("disco_virtual.txt")
-_disk_lock = threading.RLock()
+
+# Compresión automática: codec usado para archivos de al menos COMPRESION_UMBRAL bytes
+COMPRESION_CODEC = "zlib"
+COMPRESION_UMBRAL = 512
+
+_CODECS: Dict[str, Tuple[Callable[[bytes], bytes], Callable[[bytes], bytes]]] = {
+    "zlib": (zlib.compress, zlib.decompress),
+}
+if lzma is not None:
+    _CODECS["lzma"] = (lzma.compress, lzma.decompress)
+
+_RE_COMPRIMIDO = re.compile(r"~(\w+)~(\d+)~")
+_ESCAPE_RAW = "~raw~"
+_ESCAPE_LINEAS = "~esc~"
+
+# Contadores de compresión por codec
+_comp_lock = threading.Lock()
+_comp_stats: Dict[str, Dict[str, float]] = {}
+
+# Índice en memoria del disco y firma (ruta, mtime, tamaño) del archivo del que se cargó
+_index: Dict[str, str] = {}
+_index_sig: Optional[Tuple] = None
+_index_rw = LockLectoresEscritores()
+
+# Locks por archivo: un arreglo fijo indexado por hash del nombre, así la tabla no crece con
+# cada archivo creado (dos nombres pueden compartir lock; solo se serializan entre sí)
+FILE_LOCKS = 64
+_file_locks: List[threading.Lock] = [threading.Lock() for _ in range(FILE_LOCKS)]
+_file_locks_guard = threading.Lock()
+_file_lock_esperas = 0
+
+# Volcado a disco: generación del índice vs. generación ya escrita
+_flush_lock = threading.Lock()
+_gen = 0
+_gen_escrita = 0
 
 
 def _ensure_disk_exists():
@@ -42,56 +107,287 @@ def _parse_disk() -> List[tuple]:
 
 def _write_disk(entries: List[tuple]):
     lines = [f"{name}::{content}" for name, content in entries]
-    DISCO_PATH.write_text("\n".join(lines))
+    # Escritura atómica: un lector nunca ve el archivo a medio escribir
+    tmp = DISCO_PATH.with_name(DISCO_PATH.name + ".tmp")
+    tmp.write_text("\n".join(lines))
+    os.replace(tmp, DISCO_PATH)
+
+
+def _disk_sig() -> Tuple:
+    st = DISCO_PATH.stat()
+    return (str(DISCO_PATH), st.st_mtime_ns, st.st_size)
+
+
+def _ensure_index():
+    """Carga el índice si no existe o si el archivo cambió fuera de este módulo."""
+    _ensure_disk_exists()
+    if _index_sig == _disk_sig():
+        return
+    # Bajo _flush_lock ningún volcado propio está en curso: si la firma sigue
+    # sin coincidir, el cambio es externo (o DISCO_PATH cambió) y hay que recargar.
+    with _flush_lock:
+        _reload_if_stale()
+
+
+def _reload_if_stale():
+    global _index, _index_sig
+    _ensure_disk_exists()
+    sig = _disk_sig()
+    if _index_sig == sig:
+        return
+    t0 = time.perf_counter()
+    with _index_rw.escritura():
+        index = {}
+        for name, content in _parse_disk():
+            # Mismo criterio que la búsqueda lineal original: gana la primera entrada
+            index.setdefault(name, content)
+        _index = index
+        _index_sig = sig
+    if metricas.activo:
+        metricas.observar("archivos.parse_disk", time.perf_counter() - t0)
+        metricas.fijar("archivos.archivos", len(index))
+
+
+def _flush():
+    """Vuelca el índice a disco, salvo que otro hilo ya haya escrito esta generación."""
+    global _gen_escrita, _index_sig
+    with _index_rw.lectura():
+        objetivo = _gen
+    with _flush_lock:
+        if _gen_escrita >= objetivo:
+            return
+        t0 = time.perf_counter()
+        with _index_rw.lectura():
+            gen = _gen
+            entries = list(_index.items())
+        _write_disk(entries)
+        _gen_escrita = gen
+        _index_sig = _disk_sig()
+        if metricas.activo:
+            metricas.observar("archivos.volcado", time.perf_counter() - t0)
+            metricas.incrementar("archivos.volcados")
+
+
+def _stat_codec(codec: str) -> Dict[str, float]:
+    st = _comp_stats.get(codec)
+    if st is None:
+        st = _comp_stats[codec] = {
+            "archivos": 0, "bytes_logicos": 0, "bytes_almacenados": 0,
+            "tiempo_compresion": 0.0, "descompresiones": 0, "tiempo_descompresion": 0.0,
+        }
+    return st
+
+
+def _codificar(contenido: str, codec: Optional[str]) -> str:
+    """Convierte el contenido lógico a su forma almacenada en disco."""
+    datos = contenido.encode("utf-8")
+    if codec is None:
+        codec = COMPRESION_CODEC if len(datos) >= COMPRESION_UMBRAL else "none"
+    if codec != "none":
+        if codec not in _CODECS:
+            raise ValueError(f"Codec desconocido: {codec}")
+        t0 = time.perf_counter()
+        comprimido = base64.b64encode(_CODECS[codec][0](datos)).decode("ascii")
+        dt = time.perf_counter() - t0
+        almacenado = f"~{codec}~{len(datos)}~{comprimido}"
+        with _comp_lock:
+            st = _stat_codec(codec)
+            st["tiempo_compresion"] += dt
+            if len(almacenado) < len(datos):
+                st["archivos"] += 1
+                st["bytes_logicos"] += len(datos)
+                st["bytes_almacenados"] += len(almacenado)
+            ratio = st["bytes_logicos"] / st["bytes_almacenados"] if st["bytes_almacenados"] else 0.0
+        if metricas.activo:
+            metricas.observar(f"archivos.compresion.{codec}", dt)
+            metricas.fijar(f"archivos.compresion.{codec}.ratio", ratio)
+        if len(almacenado) < len(datos):
+            return almacenado
+    if contenido and contenido.splitlines() != [contenido]:
+        # Varias líneas: se escapan para no partir la entrada al releer el disco
+        return _ESCAPE_LINEAS + contenido.encode("unicode_escape").decode("ascii")
+    if contenido.startswith("~") and (contenido.startswith(_ESCAPE_RAW) or contenido.startswith(_ESCAPE_LINEAS)
+                                      or _RE_COMPRIMIDO.match(contenido)):
+        return _ESCAPE_RAW + contenido
+    return contenido
+
+
+def _decodificar(almacenado: str) -> str:
+    """Inversa de _codificar."""
+    if not almacenado.startswith("~"):
+        return almacenado
+    if almacenado.startswith(_ESCAPE_RAW):
+        return almacenado[len(_ESCAPE_RAW):]
+    if almacenado.startswith(_ESCAPE_LINEAS):
+        return almacenado[len(_ESCAPE_LINEAS):].encode("ascii").decode("unicode_escape")
+    m = _RE_COMPRIMIDO.match(almacenado)
+    if not m or m.group(1) not in _CODECS:
+        return almacenado
+    codec = m.group(1)
+    t0 = time.perf_counter()
+    datos = _CODECS[codec][1](base64.b64decode(almacenado[m.end():]))
+    dt = time.perf_counter() - t0
+    with _comp_lock:
+        st = _stat_codec(codec)
+        st["descompresiones"] += 1
+        st["tiempo_descompresion"] += dt
+    if metricas.activo:
+        metricas.observar(f"archivos.descompresion.{codec}", dt)
+    return datos.decode("utf-8")
+
+
+def _comprimido(almacenado: str):
+    """Match de la cabecera `~codec~tamaño~` si la entrada está comprimida, si no None."""
+    m = _RE_COMPRIMIDO.match(almacenado) if almacenado.startswith("~") else None
+    return m if m and m.group(1) in _CODECS else None
+
+
+def _info(nombre: str, almacenado: str) -> Dict:
+    m = _comprimido(almacenado)
+    if m:
+        codec, logico = m.group(1), int(m.group(2))
+    else:
+        codec = "none"
+        logico = len(_decodificar(almacenado).encode("utf-8"))
+    return {
+        "nombre": nombre,
+        "codec": codec,
+        "tamano_logico": logico,
+        "tamano_almacenado": len(almacenado.encode("utf-8")),
+    }
+
+
+def _file_lock(nombre: str) -> threading.Lock:
+    return _file_locks[hash(nombre) % FILE_LOCKS]
+
+
+def _acquire_file_lock(nombre: str) -> threading.Lock:
+    global _file_lock_esperas
+    lock = _file_lock(nombre)
+    if not lock.acquire(blocking=False):
+        with _file_locks_guard:
+            _file_lock_esperas += 1
+        lock.acquire()
+    return lock
 
 
 # API pública
 
 def listar_archivos() -> List[str]:
     """Lista los nombres de archivos en el disco virtual."""
-    with _disk_lock:
-        return [name for name, _ in _parse_disk()]
+    _ensure_index()
+    with _index_rw.lectura():
+        return list(_index)
 
 
 def leer_archivo(nombre: str) -> Optional[str]:
     """Lee el contenido de un archivo, o devuelve None si no existe."""
-    with _disk_lock:
-        for name, content in _parse_disk():
-            if name == nombre:
-                return content
-    return None
-
-
-def escribir_archivo(nombre: str, contenido: str) -> None:
-    """Crea o reemplaza un archivo en el disco virtual."""
-    with _disk_lock:
-        entries = _parse_disk()
-        found = False
-        for i, (name, _) in enumerate(entries):
-            if name == nombre:
-                entries[i] = (nombre, contenido)
-                found = True
-                break
-        if not found:
-            entries.append((nombre, contenido))
-        _write_disk(entries)
+    _ensure_index()
+    with _index_rw.lectura():
+        almacenado = _index.get(nombre)
+    # La descompresión se hace fuera del lock del índice
+    return None if almacenado is None else _decodificar(almacenado)
+
+
+def info_archivo(nombre: str) -> Optional[Dict]:
+    """Devuelve codec, tamaño lógico y tamaño almacenado de un archivo, o None si no existe."""
+    _ensure_index()
+    with _index_rw.lectura():
+        almacenado = _index.get(nombre)
+    return None if almacenado is None else _info(nombre, almacenado)
+
+
+def listar_archivos_detalle() -> List[Dict]:
+    """Como listar_archivos pero con la información de info_archivo para cada uno."""
+    _ensure_index()
+    with _index_rw.lectura():
+        entries = list(_index.items())
+    return [_info(nombre, almacenado) for nombre, almacenado in entries]
+
+
+def escribir_archivo(nombre: str, contenido: str, codec: Optional[str] = None) -> str:
+    """Crea o reemplaza un archivo en el disco virtual.
+
+    `codec` puede ser "zlib", "lzma" o "none"; con None se decide por COMPRESION_UMBRAL.
+    Devuelve el codec con que quedó guardado ("none" si comprimir no reducía el tamaño).
+    """
+    global _gen
+    _ensure_index()
+    lock = _acquire_file_lock(nombre)
+    try:
+        # La compresión (lo caro) ocurre solo bajo el lock del archivo
+        almacenado = _codificar(contenido, codec)
+        with _index_rw.escritura():
+            _index[nombre] = almacenado
+            _gen += 1
+        _flush()
+    finally:
+        lock.release()
+    m = _comprimido(almacenado)
+    return m.group(1) if m else "none"
 
 
 def borrar_archivo(nombre: str) -> bool:
     """Borra un archivo. Devuelve True si se borró, False si no existía."""
-    with _disk_lock:
-        entries = _parse_disk()
-        new_entries = [e for e in entries if e[0] != nombre]
-        if len(new_entries) == len(entries):
-            return False
-        _write_disk(new_entries)
+    global _gen
+    _ensure_index()
+    lock = _acquire_file_lock(nombre)
+    try:
+        with _index_rw.escritura():
+            if nombre not in _index:
+                return False
+            del _index[nombre]
+            _gen += 1
+        _flush()
         return True
+    finally:
+        lock.release()
 
 
 def formatear_disco() -> None:
     """Borra todo el disco virtual."""
-    with _disk_lock:
-        DISCO_PATH.write_text("")
+    global _gen
+    _ensure_index()
+    with _index_rw.escritura():
+        _index.clear()
+        _gen += 1
+    _flush()
+
+
+def exportar_indice() -> List[Tuple[str, str]]:
+    """Entradas (nombre, contenido almacenado) del disco, tal como están en el índice."""
+    _ensure_index()
+    with _index_rw.lectura():
+        return list(_index.items())
+
+
+def cargar_indice(entries: List[Tuple[str, str]]) -> None:
+    """Reemplaza el disco por `entries` (contenido almacenado, sin recomprimir)."""
+    global _gen
+    _ensure_index()
+    with _index_rw.escritura():
+        _index.clear()
+        _index.update(entries)
+        _gen += 1
+    _flush()
+
+
+def estadisticas_bloqueo() -> Dict[str, int]:
+    """Contadores de contención: esperas en el lock del índice y en los locks por archivo."""
+    stats = _index_rw.stats()
+    with _file_locks_guard:
+        stats["esperas_lock_archivo"] = _file_lock_esperas
+        stats["locks_archivo"] = len(_file_locks)
+    return stats
+
+
+def estadisticas_compresion() -> Dict[str, Dict[str, float]]:
+    """Por codec: archivos comprimidos, bytes lógicos/almacenados, ratio y tiempos de codec."""
+    with _comp_lock:
+        out = {codec: dict(st) for codec, st in _comp_stats.items()}
+    for st in out.values():
+        st["ratio"] = st["bytes_logicos"] / st["bytes_almacenados"] if st["bytes_almacenados"] else 0.0
+    return out
 
 
 if __name__ == "__main__":
@@ -100,4 +396,7 @@ if __name__ == "__main__":
     escribir_archivo("hola.txt", "Hola desde el disco virtual")
     print(listar_archivos())
     print(leer_archivo("hola.txt"))
-
+    escribir_archivo("log.txt", "linea de log repetida\n" * 100)
+    print(listar_archivos_detalle())
+    print(estadisticas_bloqueo())
+    print(estadisticas_compresion())
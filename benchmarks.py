@@ -0,0 +1,258 @@
+"""
+Archivo: benchmarks.py
+Suite de benchmarks del prototipo (sin GUI): memoria, scheduler, sistema de archivos y shell.
+
+Uso:
+    python benchmarks.py                          # corre todo e imprime resultados
+    python benchmarks.py --json actual.json       # guarda los resultados en JSON
+    python benchmarks.py --comparar base.json     # compara contra un baseline guardado
+    python benchmarks.py --rapido --solo archivos # tamaños reducidos / solo un grupo
+
+Cada métrica guarda su valor, unidad y si "más es mejor". Con --comparar se marca como
+regresión todo cambio peor que --tolerancia (10% por defecto) y el código de salida es 1.
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+from contextlib import redirect_stdout
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+import archivos
+import memoria
+import metricas
+import procesos
+import shell
+
+Resultados = Dict[str, Dict]
+
+
+def _mejor_de(fn: Callable[[], None], repeticiones: int = 3) -> float:
+    """Ejecuta fn `repeticiones` veces y devuelve el menor tiempo (segundos)."""
+    mejor = float("inf")
+    for _ in range(repeticiones):
+        t0 = time.perf_counter()
+        fn()
+        mejor = min(mejor, time.perf_counter() - t0)
+    return mejor
+
+
+def _metrica(res: Resultados, nombre: str, valor: float, unidad: str, mayor_es_mejor: bool):
+    res[nombre] = {"valor": valor, "unidad": unidad, "mayor_es_mejor": mayor_es_mejor}
+
+
+# ---------------- Memoria ----------------
+
+def bench_memoria(rapido: bool) -> Resultados:
+    res: Resultados = {}
+    for frames in ((32, 1024) if rapido else (32, 1024, 16384)):
+        m = memoria.Memoria(frames=frames, frame_size=256)
+        ops = max(50, 200000 // frames)
+
+        def churn():
+            for pid in range(ops):
+                m.allocate_frames(pid, 4)
+                m.free_frames(pid)
+        t = _mejor_de(churn)
+        _metrica(res, f"memoria.churn.{frames}_frames", ops / t, "alloc+free/s", True)
+
+    m = memoria.Memoria(frames=256, frame_size=256)
+    datos = bytes(range(256))
+    n = 20000 if rapido else 100000
+
+    def escribir():
+        for i in range(n):
+            m.write(i & 255, 0, datos)
+
+    def leer():
+        for i in range(n):
+            m.read(i & 255, 0, 256)
+    mb = n * 256 / 1e6
+    _metrica(res, "memoria.write", mb / _mejor_de(escribir), "MB/s", True)
+    _metrica(res, "memoria.read", mb / _mejor_de(leer), "MB/s", True)
+    return res
+
+
+# ---------------- Scheduler ----------------
+
+def _dispatch(nprocs: int, instrucciones: int, quantum: int) -> float:
+    """Segundos en despachar hasta terminar `nprocs` procesos de instrucciones vacías."""
+    g = procesos.GestorProcesos(memoria.Memoria(frames=4 * nprocs), quantum=quantum)
+    nada = lambda p: None
+    with open(os.devnull, "w") as devnull, redirect_stdout(devnull):
+        for i in range(nprocs):
+            g.crear_proceso(f"b{i}", [nada] * instrucciones)
+        t0 = time.perf_counter()
+        while g.ready_queue:
+            g._schedule_once()
+        t = time.perf_counter() - t0
+    return t
+
+
+def bench_scheduler(rapido: bool) -> Resultados:
+    res: Resultados = {}
+    anterior = procesos.Proceso.TIEMPO_INSTRUCCION
+    procesos.Proceso.TIEMPO_INSTRUCCION = 0  # medir solo el scheduler
+    try:
+        nprocs, instr = (50, 20) if rapido else (200, 50)
+        # quantum=1: un despacho (cambio de contexto) por instrucción
+        t_q1 = min(_dispatch(nprocs, instr, 1) for _ in range(3))
+        # quantum grande: un despacho por proceso
+        t_qn = min(_dispatch(nprocs, instr, instr) for _ in range(3))
+        despachos_q1 = nprocs * instr
+        _metrica(res, "scheduler.despachos", despachos_q1 / t_q1, "despachos/s", True)
+        _metrica(res, "scheduler.instrucciones", despachos_q1 / t_qn, "instr/s", True)
+        extra = (t_q1 - t_qn) / max(despachos_q1 - nprocs, 1)
+        _metrica(res, "scheduler.costo_cambio_contexto", extra * 1e6, "us", False)
+    finally:
+        procesos.Proceso.TIEMPO_INSTRUCCION = anterior
+    return res
+
+
+# ---------------- Archivos ----------------
+
+def bench_archivos(rapido: bool) -> Resultados:
+    res: Resultados = {}
+    anterior = archivos.DISCO_PATH
+    with tempfile.TemporaryDirectory() as tmp:
+        try:
+            for nfiles in ((10, 1000) if rapido else (10, 1000, 100000)):
+                archivos.DISCO_PATH = Path(tmp) / f"disco_{nfiles}.txt"
+                nombres = [f"f{i}.txt" for i in range(nfiles)]
+                archivos.DISCO_PATH.write_text("\n".join(f"{n}::contenido de {n}" for n in nombres))
+
+                t0 = time.perf_counter()
+                archivos.listar_archivos()  # primera llamada: parsea el disco
+                _metrica(res, f"archivos.{nfiles}.carga", (time.perf_counter() - t0) * 1000, "ms", False)
+
+                t = _mejor_de(archivos.listar_archivos)
+                _metrica(res, f"archivos.{nfiles}.listar", t * 1000, "ms", False)
+
+                azar = random.Random(1)
+                lecturas = [azar.choice(nombres) for _ in range(20000)]
+
+                def leer():
+                    for n in lecturas:
+                        archivos.leer_archivo(n)
+                _metrica(res, f"archivos.{nfiles}.leer", len(lecturas) / _mejor_de(leer), "ops/s", True)
+
+                # Cada escritura vuelca el disco completo: menos repeticiones en discos grandes
+                escrituras = max(5, min(500, 500000 // nfiles))
+
+                def escribir():
+                    for i in range(escrituras):
+                        archivos.escribir_archivo(nombres[i % nfiles], f"nuevo {i}")
+                _metrica(res, f"archivos.{nfiles}.escribir", escrituras / _mejor_de(escribir, 1), "ops/s", True)
+
+                def crear_borrar():
+                    for i in range(escrituras // 2):
+                        archivos.escribir_archivo(f"tmp{i}", "x")
+                        archivos.borrar_archivo(f"tmp{i}")
+                _metrica(res, f"archivos.{nfiles}.crear_borrar", escrituras / _mejor_de(crear_borrar, 1), "ops/s", True)
+        finally:
+            archivos.DISCO_PATH = anterior
+    return res
+
+
+# ---------------- Shell ----------------
+
+def bench_shell(rapido: bool) -> Resultados:
+    res: Resultados = {}
+    anterior = archivos.DISCO_PATH
+    with tempfile.TemporaryDirectory() as tmp:
+        archivos.DISCO_PATH = Path(tmp) / "disco_shell.txt"
+        try:
+            m = memoria.Memoria(frames=32, frame_size=256)
+            g = procesos.GestorProcesos(m, quantum=2)
+            sh = shell.Shell(g, m, medir_latencias=True)
+            comandos = ['write a.txt "hola mundo"', "cat a.txt", "ls", "ls -l", "ps", "memstat", "run demo", "kill 999999"]
+            n = 100 if rapido else 500
+            with open(os.devnull, "w") as devnull, redirect_stdout(devnull):
+                for _ in range(n):
+                    for c in comandos:
+                        sh.execute_line(c)
+                    for p in list(g.ready_queue):  # no acumular procesos entre rondas
+                        g.terminar_proceso(p.pid)
+            for cmd, valores in sorted(sh.latencias.items()):
+                valores.sort()
+                _metrica(res, f"shell.{cmd}.p50", metricas.percentil(valores, 0.50) * 1e6, "us", False)
+                _metrica(res, f"shell.{cmd}.p95", metricas.percentil(valores, 0.95) * 1e6, "us", False)
+        finally:
+            archivos.DISCO_PATH = anterior
+    return res
+
+
+GRUPOS: Dict[str, Callable[[bool], Resultados]] = {
+    "memoria": bench_memoria,
+    "scheduler": bench_scheduler,
+    "archivos": bench_archivos,
+    "shell": bench_shell,
+}
+
+
+def ejecutar(grupos: Optional[List[str]] = None, rapido: bool = False) -> Dict:
+    """Corre los grupos pedidos (todos por defecto) y devuelve el documento JSON."""
+    resultados: Resultados = {}
+    for nombre in grupos or GRUPOS:
+        print(f"== {nombre}", file=sys.stderr)
+        resultados.update(GRUPOS[nombre](rapido))
+    return {
+        "meta": {
+            "python": platform.python_version(),
+            "plataforma": platform.platform(),
+            "fecha": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "rapido": rapido,
+        },
+        "resultados": resultados,
+    }
+
+
+def comparar(actual: Dict, base: Dict, tolerancia: float = 0.10) -> List[str]:
+    """Imprime la comparación y devuelve los nombres de métricas que empeoraron más de `tolerancia`."""
+    regresiones = []
+    print(f"{'métrica':40} {'base':>12} {'actual':>12} {'cambio':>8}")
+    for nombre, r in sorted(actual["resultados"].items()):
+        b = base.get("resultados", {}).get(nombre)
+        if b is None or not b["valor"]:
+            print(f"{nombre:40} {'-':>12} {r['valor']:12.3f}  (nueva)")
+            continue
+        cambio = (r["valor"] - b["valor"]) / b["valor"]
+        peor = -cambio if r["mayor_es_mejor"] else cambio
+        marca = "  REGRESIÓN" if peor > tolerancia else ""
+        if marca:
+            regresiones.append(nombre)
+        print(f"{nombre:40} {b['valor']:12.3f} {r['valor']:12.3f} {cambio:+8.1%}{marca}")
+    return regresiones
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmarks del prototipo de SO")
+    parser.add_argument("--json", metavar="ARCHIVO", help="guarda los resultados en JSON")
+    parser.add_argument("--comparar", metavar="BASELINE", help="compara contra un JSON anterior")
+    parser.add_argument("--tolerancia", type=float, default=0.10, help="empeoramiento tolerado (0.10 = 10%%)")
+    parser.add_argument("--solo", action="append", choices=list(GRUPOS), help="grupo a correr (repetible)")
+    parser.add_argument("--rapido", action="store_true", help="tamaños reducidos")
+    args = parser.parse_args(argv)
+
+    doc = ejecutar(args.solo, args.rapido)
+    if args.json:
+        Path(args.json).write_text(json.dumps(doc, indent=2, ensure_ascii=False))
+    if args.comparar:
+        base = json.loads(Path(args.comparar).read_text())
+        regresiones = comparar(doc, base, args.tolerancia)
+        if regresiones:
+            print(f"\n{len(regresiones)} regresiones (tolerancia {args.tolerancia:.0%})")
+            return 1
+        return 0
+    for nombre, r in sorted(doc["resultados"].items()):
+        print(f"{nombre:40} {r['valor']:14.3f} {r['unidad']}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -2,17 +2,22 @@
 """
 GUI en español (Tkinter) para el prototipo de SO.
 
-- Pestañas: Terminal, Memoria
+- Pestañas: Terminal, Memoria, Procesos (tabla tipo "top" y gráficas de cola, throughput y memoria)
 - Barra de botones funcionales (archivo/proceso/memoria) y campos de entrada
+- Consola alimentada por una cola (segura para el hilo del scheduler) con límite de líneas
 - Atajos: F1 (ayuda), Ctrl+Enter (ejecutar), Ctrl+L (limpiar), F5 (refrescar Memoria)
+- La pestaña Memoria se actualiza de forma incremental (solo marcos cambiados) y, con muchos
+  marcos, pasa a una vista agregada con zoom
 - Alias de comandos en español (ayuda, listar, ver, escribir, borrar, ejecutar, procesos, terminar, memoria, formatear, salir)
 
 NOTA: Esta GUI llama a los comandos de la Shell del prototipo. Si algún comando aún no existe en tu
 `shell.py`, seguirá aceptando el alias pero mostrará "Comando no encontrado".
 """
-import io, shlex, tkinter as tk
+import bisect, queue, shlex, sys, time, tkinter as tk
+from collections import deque
 from tkinter import ttk, scrolledtext, messagebox
-from contextlib import redirect_stdout, redirect_stderr
+from contextlib import redirect_stderr
+from typing import Optional
 
 import procesos
 import memoria
@@ -20,13 +25,47 @@ import shell
 
 
 class TkConsole(scrolledtext.ScrolledText):
+    """Consola segura entre hilos: write() solo encola; un timer de Tk inserta por lotes.
+
+    Cualquier hilo (p. ej. el scheduler) puede escribir. El widget solo se toca desde el hilo
+    de Tk, como mucho cada INTERVALO_MS, y conserva como máximo `max_lineas` líneas.
+    """
+    INTERVALO_MS = 50      # ~20 refrescos por segundo
+    MAX_LOTE = 5000        # escrituras máximas por refresco
+
+    def __init__(self, master=None, max_lineas: int = 5000, **kw):
+        super().__init__(master, **kw)
+        self.max_lineas = max_lineas
+        self._cola = queue.SimpleQueue()
+        self.after(self.INTERVALO_MS, self._drenar)
+
     def write(self, s):
-        self.configure(state="normal")
-        self.insert(tk.END, s)
-        self.see(tk.END)
-        self.configure(state="disabled")
+        if s:
+            self._cola.put(s)
+
     def flush(self): pass
 
+    def _drenar(self):
+        partes = []
+        try:
+            while len(partes) < self.MAX_LOTE:
+                partes.append(self._cola.get_nowait())
+        except queue.Empty:
+            pass
+        if partes:
+            texto = "".join(partes)
+            if texto.count("\n") > self.max_lineas:
+                # Lo que no cabe se descartaría al recortar: no se inserta
+                texto = "\n".join(texto.split("\n")[-self.max_lineas - 1:])
+            self.configure(state="normal")
+            self.insert(tk.END, texto)
+            lineas = int(self.index("end-1c").split(".")[0])
+            if lineas > self.max_lineas:
+                self.delete("1.0", f"{lineas - self.max_lineas + 1}.0")
+            self.see(tk.END)
+            self.configure(state="disabled")
+        self.after(self.INTERVALO_MS, self._drenar)
+
 
 class App:
     def __init__(self, root: tk.Tk):
@@ -38,16 +77,6 @@ class App:
         self.mem = memoria.Memoria(frames=32, frame_size=256)
         self.gestor = procesos.GestorProcesos(self.mem, quantum=2)
         self.shell = shell.Shell(self.gestor, self.mem)
-        try:
-            self.gestor.iniciar()  # Mueve aquí si no está; genera logs inmediatos
-            # Redirige logs del gestor a consola Tkinter
-            if hasattr(self.gestor, 'set_log_callback'):  # Si agregas en procesos.py
-                def log_to_console(msg):
-                    self.console.insert("end", msg + "\n")
-                    self.console.see("end")  # Auto-scroll
-                self.gestor.set_log_callback(log_to_console)
-        except Exception as e:
-            self.console.insert("end", f"Error iniciando gestor: {e}\n")
 
         # Preparar alias ES
         self._add_spanish_aliases()
@@ -66,14 +95,29 @@ class App:
         self.nb.add(self.tab_mem, text="Memoria")
         self._build_mem(self.tab_mem)
 
+        # Procesos
+        self.tab_proc = ttk.Frame(self.nb)
+        self.nb.add(self.tab_proc, text="Procesos")
+        self._build_procesos(self.tab_proc)
+
         # Eventos
         self.root.protocol("WM_DELETE_WINDOW", self.on_close)
         self.root.bind("<F1>", lambda e: self.execute_line("ayuda"))
-        self.root.bind("<F5>", lambda e: self.draw_memory())
+        self.root.bind("<F5>", lambda e: self.draw_memory(completo=True))
         self.nb.bind("<<NotebookTabChanged>>", lambda e: self.draw_memory())
 
         self.console.write("Bienvenido. Use los botones o escriba comandos. Pruebe 'ayuda'.\n")
 
+        # Todo print (incluido el hilo del scheduler) va a la cola de la consola;
+        # execute_line captura aparte la salida del comando en curso.
+        self._stdout_original = sys.stdout
+        self.salida = shell.SalidaPorHilo(self.console)
+        sys.stdout = self.salida
+        try:
+            self.gestor.iniciar()  # genera logs inmediatos
+        except Exception as e:
+            self.console.write(f"Error iniciando gestor: {e}\n")
+
     # ---------------- Alias ES ----------------
     def _add_spanish_aliases(self):
         # Mapear alias ES -> comando base existente
@@ -94,6 +138,10 @@ class App:
         link("procesos", "ps")
         link("terminar", "kill")
         link("memoria", "memstat")
+        link("tiempo", "time")
+        link("estadisticas", "stats")
+        link("guardar", "snapshot")
+        link("restaurar", "restore")
         # salir
         if "exit" in base:
             base["salir"] = base["exit"]
@@ -220,9 +268,8 @@ class App:
             self.console.write(f"Comando no encontrado: {cmd}. Pruebe 'ayuda'.\n")
             return
 
-        buf = io.StringIO()
         try:
-            with redirect_stdout(buf), redirect_stderr(buf):
+            with self.salida.capturar() as buf, redirect_stderr(buf):
                 func(args)
         except Exception as e:
             self.console.write(f"Error ejecutando {cmd}: {e}\n")
@@ -230,69 +277,338 @@ class App:
             out = buf.getvalue()
             if out:
                 self.console.write(out)
-        finally:
-            buf.close()
 
         # tras ejecutar, refrescar memoria si se está mostrando
         self.draw_memory()
 
     # ---------------- Memoria ----------------
+    # La vista de memoria conserva sus items del canvas y solo actualiza los marcos cuyo dueño
+    # cambió (memoria.Memoria.cambios_desde). Los refrescos se agrupan en un timer de root.after.
+    # Con muchos marcos se usa una vista agregada: cada celda resume `zoom` marcos y su color
+    # indica el porcentaje ocupado.
+    MEM_REFRESCO_MS = 100
+    MEM_UMBRAL_AGREGADO = 2048   # marcos a partir de los cuales se agrega
+    MEM_MAX_CELDAS = 16384       # celdas máximas en la vista agregada
+    COLOR_LIBRE = "#7bc96f"
+    COLOR_OCUPADO = "#82aaff"
+
     def _build_mem(self, parent):
         wrap = ttk.Frame(parent, padding=8)
         wrap.pack(fill="both", expand=True)
+        bar = ttk.Frame(wrap)
+        bar.pack(fill="x", side="top")
+        ttk.Button(bar, text="Zoom +", command=lambda: self._mem_cambiar_zoom(0.5)).pack(side="left")
+        ttk.Button(bar, text="Zoom −", command=lambda: self._mem_cambiar_zoom(2)).pack(side="left", padx=4)
+        self.var_zoom = tk.StringVar()
+        ttk.Label(bar, textvariable=self.var_zoom).pack(side="left", padx=8)
         self.canvas = tk.Canvas(wrap, height=420)
         self.canvas.pack(fill="both", expand=True, side="left")
         vs = ttk.Scrollbar(wrap, orient="vertical", command=self.canvas.yview)
         self.canvas.configure(yscrollcommand=vs.set)
         vs.pack(side="right", fill="y")
+        self._mem_after = None
+        self._mem_version = -1        # -1: reconstruir todo en el próximo refresco
+        self._mem_vista = []          # dueño de cada marco según lo dibujado
+        self._mem_items = []          # por marco (rect, texto PID) o por celda (rect,)
+        self._mem_usados = []         # vista agregada: marcos ocupados por celda
+        self._mem_ocupados = 0        # marcos ocupados en total según lo dibujado
+        self._mem_stats_item = None
+        self._mem_frames = self.mem.frames  # tamaño para el que se eligió el zoom
+        self._mem_zoom = self._mem_zoom_minimo()
         self.draw_memory()
 
-    def draw_memory(self):
-        c = getattr(self, "canvas", None)
-        if not c: return
-        c.delete("all")
-
-        # --- NUEVO: mostrar estadísticas ---
-        stats = self.mem.status()
+    def _mem_zoom_minimo(self, frames: Optional[int] = None) -> int:
+        if frames is None:
+            frames = self.mem.frames
+        if frames <= self.MEM_UMBRAL_AGREGADO:
+            return 1
+        zoom = 2
+        while (frames + zoom - 1) // zoom > self.MEM_MAX_CELDAS:
+            zoom *= 2
+        return zoom
+
+    def _mem_cambiar_zoom(self, factor):
+        zoom = max(self._mem_zoom_minimo(), int(self._mem_zoom * factor))
+        zoom = min(zoom, max(1, self.mem.frames))
+        if zoom != self._mem_zoom:
+            self._mem_zoom = zoom
+            self.draw_memory(completo=True)
+
+    def draw_memory(self, completo: bool = False):
+        """Programa un refresco de la vista de memoria (varias llamadas seguidas se agrupan)."""
+        if not getattr(self, "canvas", None):
+            return
+        if completo:
+            self._mem_version = -1
+        if self._mem_after is None:
+            self._mem_after = self.root.after(self.MEM_REFRESCO_MS, self._refrescar_memoria)
+
+    def _refrescar_memoria(self):
+        self._mem_after = None
+        if self.nb.select() != str(self.tab_mem):
+            return  # se refresca al volver a la pestaña (<<NotebookTabChanged>>)
+        if self._mem_version < 0:
+            version, cambios = self.mem.version, None
+        else:
+            version, cambios = self.mem.cambios_desde(self._mem_version)
+        if cambios is None or len(self._mem_vista) != self.mem.frames:
+            self._construir_mapa(self.mem.frame_owners())
+        elif cambios:
+            self._aplicar_cambios(cambios)
+        self._mem_version = version
+
+        usados = self._mem_ocupados
         text_stats = (
-            f"Total: {stats['frames_total']} | "
-            f"Usados: {stats['frames_used']} | "
-            f"Libres: {stats['frames_free']} | "
-            f"Tamaño marco: {stats['frame_size']} bytes"
+            f"Total: {len(self._mem_vista)} | "
+            f"Usados: {usados} | "
+            f"Libres: {len(self._mem_vista) - usados} | "
+            f"Tamaño marco: {self.mem.frame_size} bytes"
         )
-        c.create_text(10, 10, text=text_stats, anchor="w", font=("Consolas", 10, "bold"))
+        self.canvas.itemconfigure(self._mem_stats_item, text=text_stats)
 
+    def _construir_mapa(self, owner):
+        c = self.canvas
+        c.delete("all")
+        self._mem_stats_item = c.create_text(10, 10, text="", anchor="w", font=("Consolas", 10, "bold"))
+        frames = len(owner)
+        if frames != self._mem_frames:
+            # La memoria cambió de tamaño (p. ej. al restaurar una instantánea): sin esto un
+            # mapa grande se dibujaría a zoom 1, con varios items por marco
+            self._mem_frames = frames
+            self._mem_zoom = self._mem_zoom_minimo(frames)
+        self._mem_zoom = max(self._mem_zoom, self._mem_zoom_minimo(frames))
+        self._mem_vista = [owner.get(i) for i in range(frames)]
+        self._mem_ocupados = frames - self._mem_vista.count(None)
+        self._mem_items = []
         # Ajustar coordenada Y para no tapar
         offset_y = 30
-        frames = getattr(self.mem, "frames", 32)
-        owner = getattr(self.mem, "_owner", {})
-        cols, size, pad = 16, 26, 6
-        rows = (frames + cols - 1)//cols
-        for idx in range(frames):
-            r = idx//cols; col = idx%cols
-            x0 = pad + col*(size+pad); y0 = offset_y + pad + r*(size+pad)
-            x1, y1 = x0 + size, y0 + size
-            pid = owner.get(idx, None)
-            fill = "#7bc96f" if pid is None else "#82aaff"
-            c.create_rectangle(x0, y0, x1, y1, fill=fill, outline="#333")
-            c.create_text((x0+x1)//2, (y0+y1)//2-4, text=str(idx), font=("Consolas", 8))
-            # --- NUEVO: mostrar PID si ocupado ---
-            if pid is not None:
-                c.create_text((x0+x1)//2, (y0+y1)//2+6, text=f"P{pid}", font=("Consolas", 7))
+        zoom = self._mem_zoom
+        if zoom == 1:
+            self.var_zoom.set("1 celda = 1 marco")
+            cols, size, pad = 16, 26, 6
+            for idx, pid in enumerate(self._mem_vista):
+                r = idx//cols; col = idx%cols
+                x0 = pad + col*(size+pad); y0 = offset_y + pad + r*(size+pad)
+                x1, y1 = x0 + size, y0 + size
+                fill = self.COLOR_LIBRE if pid is None else self.COLOR_OCUPADO
+                rect = c.create_rectangle(x0, y0, x1, y1, fill=fill, outline="#333")
+                c.create_text((x0+x1)//2, (y0+y1)//2-4, text=str(idx), font=("Consolas", 8))
+                txt = c.create_text((x0+x1)//2, (y0+y1)//2+6, text="" if pid is None else f"P{pid}", font=("Consolas", 7))
+                self._mem_items.append((rect, txt))
+            celdas = frames
+        else:
+            self.var_zoom.set(f"1 celda = {zoom} marcos (color = % ocupado)")
+            cols, size, pad = 64, 10, 2
+            celdas = (frames + zoom - 1) // zoom
+            self._mem_usados = [0] * celdas
+            for idx, pid in enumerate(self._mem_vista):
+                if pid is not None:
+                    self._mem_usados[idx // zoom] += 1
+            for cel in range(celdas):
+                r = cel//cols; col = cel%cols
+                x0 = pad + col*(size+pad); y0 = offset_y + pad + r*(size+pad)
+                rect = c.create_rectangle(x0, y0, x0 + size, y0 + size, fill=self._mem_color_celda(cel), outline="")
+                self._mem_items.append((rect,))
 
         # leyenda
+        rows = (celdas + cols - 1)//cols
         yleg = offset_y + rows*(size+pad) + 8
-        c.create_rectangle(pad, yleg, pad+20, yleg+20, fill="#7bc96f", outline="#333")
+        c.create_rectangle(pad, yleg, pad+20, yleg+20, fill=self.COLOR_LIBRE, outline="#333")
         c.create_text(pad+26, yleg+10, text="Libre", anchor="w")
-        c.create_rectangle(pad+90, yleg, pad+110, yleg+20, fill="#82aaff", outline="#333")
+        c.create_rectangle(pad+90, yleg, pad+110, yleg+20, fill=self.COLOR_OCUPADO, outline="#333")
         c.create_text(pad+116, yleg+10, text="Ocupado", anchor="w")
         c.configure(scrollregion=c.bbox("all"))
 
+    def _aplicar_cambios(self, cambios):
+        c = self.canvas
+        zoom = self._mem_zoom
+        sucias = set()
+        for idx, pid in cambios.items():
+            anterior = self._mem_vista[idx]
+            if anterior == pid:
+                continue
+            self._mem_vista[idx] = pid
+            if (anterior is None) != (pid is None):
+                self._mem_ocupados += 1 if anterior is None else -1
+            if zoom == 1:
+                rect, txt = self._mem_items[idx]
+                c.itemconfigure(rect, fill=self.COLOR_LIBRE if pid is None else self.COLOR_OCUPADO)
+                c.itemconfigure(txt, text="" if pid is None else f"P{pid}")
+            elif (anterior is None) != (pid is None):
+                cel = idx // zoom
+                self._mem_usados[cel] += 1 if anterior is None else -1
+                sucias.add(cel)
+        for cel in sucias:
+            c.itemconfigure(self._mem_items[cel][0], fill=self._mem_color_celda(cel))
+
+    def _mem_color_celda(self, cel: int) -> str:
+        """Interpola entre COLOR_LIBRE y COLOR_OCUPADO según el porcentaje ocupado de la celda."""
+        zoom = self._mem_zoom
+        total = min(zoom, len(self._mem_vista) - cel * zoom)
+        f = self._mem_usados[cel] / total if total else 0.0
+        a = [int(self.COLOR_LIBRE[i:i+2], 16) for i in (1, 3, 5)]
+        b = [int(self.COLOR_OCUPADO[i:i+2], 16) for i in (1, 3, 5)]
+        return "#" + "".join(f"{round(x + (y - x) * f):02x}" for x, y in zip(a, b))
+
+    # ---------------- Procesos ----------------
+    # Tabla refrescada a ritmo fijo con GestorProcesos.snapshot(version): solo llegan las filas
+    # de procesos que cambiaron, y solo esas se actualizan en el Treeview. Las gráficas usan
+    # GestorProcesos.metricas() y Memoria.status(), ambos O(1).
+    PROC_REFRESCO_MS = 500
+    PROC_REORDEN_MS = 2000      # recolocar las filas cambiadas como mucho cada tanto
+    PROC_HISTORIA = 120         # muestras por gráfica
+    PROC_COLUMNAS = (("pid", "PID", 60), ("nombre", "Nombre", 160), ("estado", "Estado", 100),
+                     ("pc", "PC", 60), ("cpu", "CPU (s)", 80), ("frames", "Marcos", 70))
+
+    def _build_procesos(self, parent):
+        wrap = ttk.Frame(parent, padding=8)
+        wrap.pack(fill="both", expand=True)
+
+        graf = ttk.Frame(wrap)
+        graf.pack(fill="x")
+        self._sparks = {}
+        for clave, titulo in (("listos", "Cola de listos"), ("throughput", "Instrucciones/s"),
+                              ("memoria", "Marcos usados")):
+            box = ttk.LabelFrame(graf, text=titulo, padding=4)
+            box.pack(side="left", fill="x", expand=True, padx=4)
+            cv = tk.Canvas(box, height=60, width=240, bg="white", highlightthickness=0)
+            cv.pack(fill="x")
+            linea = cv.create_line(0, 0, 0, 0, fill="#3366cc", width=2)
+            etiqueta = cv.create_text(4, 4, anchor="nw", text="", font=("Consolas", 8))
+            self._sparks[clave] = (cv, linea, etiqueta, deque(maxlen=self.PROC_HISTORIA))
+
+        tabla = ttk.Frame(wrap)
+        tabla.pack(fill="both", expand=True, pady=(8, 0))
+        columnas = [c for c, _, _ in self.PROC_COLUMNAS]
+        self.tree = ttk.Treeview(tabla, columns=columnas, show="headings")
+        for c, titulo, ancho in self.PROC_COLUMNAS:
+            self.tree.heading(c, text=titulo, command=lambda c=c: self._proc_ordenar_por(c))
+            self.tree.column(c, width=ancho, anchor="w" if c in ("nombre", "estado") else "e")
+        self.tree.pack(fill="both", expand=True, side="left")
+        vs = ttk.Scrollbar(tabla, orient="vertical", command=self.tree.yview)
+        self.tree.configure(yscrollcommand=vs.set)
+        vs.pack(side="right", fill="y")
+
+        self._proc_version = 0
+        self._proc_epoca = 0              # época del gestor (cambia al restaurar una instantánea)
+        self._proc_filas = {}             # pid -> última fila mostrada
+        self._proc_orden = ("pid", False)  # (columna, descendente)
+        # Orden mantenido incrementalmente: claves (valor, pid) ascendentes, igual que la tabla
+        # (invertida si es descendente); solo se recolocan las filas cuya clave cambió
+        self._proc_claves = []
+        self._proc_clave_de = {}          # pid -> clave con la que está en _proc_claves
+        self._proc_pendientes = set()     # pids nuevos o con clave cambiada
+        self._proc_ultimo_orden = 0.0
+        self._proc_muestra = None         # (instante, instrucciones) de la muestra anterior
+        self.root.after(self.PROC_REFRESCO_MS, self._refrescar_procesos)
+
+    def _refrescar_procesos(self):
+        try:
+            self._actualizar_procesos()
+        finally:
+            # Un refresco fallido no debe detener la pestaña para siempre
+            self.root.after(self.PROC_REFRESCO_MS, self._refrescar_procesos)
+
+    def _actualizar_procesos(self):
+        ahora = time.monotonic()
+        m = self.gestor.metricas()
+        if m["epoca"] != self._proc_epoca:
+            # Se restauró una instantánea: los procesos anteriores ya no existen
+            self.tree.delete(*self.tree.get_children())
+            self._proc_filas = {}
+            self._proc_claves = []
+            self._proc_clave_de = {}
+            self._proc_pendientes = set()
+            self._proc_version = 0
+            self._proc_epoca = m["epoca"]
+            self._proc_muestra = None
+        throughput = 0.0
+        if self._proc_muestra:
+            t0, instr0 = self._proc_muestra
+            throughput = (m["instrucciones"] - instr0) / max(ahora - t0, 1e-6)
+        self._proc_muestra = (ahora, m["instrucciones"])
+        self._sparks["listos"][3].append(m["listos"])
+        self._sparks["throughput"][3].append(throughput)
+        self._sparks["memoria"][3].append(self.mem.status()["frames_used"])
+
+        if self.nb.select() == str(self.tab_proc):
+            version, filas = self.gestor.snapshot(self._proc_version)
+            col = self._proc_orden[0]
+            # snapshot() entrega primero lo más reciente; se inserta en orden de creación
+            for f in reversed(filas):
+                pid = f["pid"]
+                iid = str(pid)
+                valores = tuple(f"{f[c]:.1f}" if c == "cpu" else f[c] for c, _, _ in self.PROC_COLUMNAS)
+                if pid in self._proc_filas:
+                    self.tree.item(iid, values=valores)
+                    clave = self._proc_clave_de.get(pid)
+                    # Sin clave: fila insertada que aún espera su primer reordenamiento
+                    if clave is None or clave[0] != f[col]:
+                        self._proc_pendientes.add(pid)  # con columnas fijas (PID) nunca pasa
+                else:
+                    self.tree.insert("", "end", iid=iid, values=valores)
+                    self._proc_pendientes.add(pid)
+                self._proc_filas[pid] = f
+            self._proc_version = version
+            if self._proc_pendientes and (ahora - self._proc_ultimo_orden) * 1000 >= self.PROC_REORDEN_MS:
+                self._proc_recolocar()
+            for clave in self._sparks:
+                self._spark_dibujar(clave)
+
+    def _proc_ordenar_por(self, columna: str):
+        col, desc = self._proc_orden
+        self._proc_orden = (columna, not desc if col == columna else False)
+        self._proc_aplicar_orden()
+
+    def _proc_aplicar_orden(self):
+        """Reordena la tabla completa (solo al cambiar la columna o el sentido)."""
+        col, desc = self._proc_orden
+        self._proc_claves = sorted((f[col], pid) for pid, f in self._proc_filas.items())
+        self._proc_clave_de = {clave[1]: clave for clave in self._proc_claves}
+        self._proc_pendientes.clear()
+        orden = reversed(self._proc_claves) if desc else self._proc_claves
+        for i, (_, pid) in enumerate(orden):
+            self.tree.move(str(pid), "", i)
+        self._proc_ultimo_orden = time.monotonic()
+
+    def _proc_recolocar(self):
+        """Mueve a su lugar solo las filas nuevas o cuya clave de orden cambió."""
+        col, desc = self._proc_orden
+        claves = self._proc_claves
+        for pid in self._proc_pendientes:
+            vieja = self._proc_clave_de.get(pid)
+            if vieja is not None:
+                del claves[bisect.bisect_left(claves, vieja)]
+            nueva = (self._proc_filas[pid][col], pid)
+            i = bisect.bisect_left(claves, nueva)
+            claves.insert(i, nueva)
+            self._proc_clave_de[pid] = nueva
+            iid = str(pid)
+            self.tree.detach(iid)  # el índice de move() cuenta sin la propia fila
+            self.tree.move(iid, "", len(claves) - 1 - i if desc else i)
+        self._proc_pendientes.clear()
+        self._proc_ultimo_orden = time.monotonic()
+
+    def _spark_dibujar(self, clave: str):
+        cv, linea, etiqueta, datos = self._sparks[clave]
+        if len(datos) < 2:
+            return
+        ancho = max(cv.winfo_width(), 2)
+        alto = int(cv["height"])
+        tope = max(datos) or 1
+        paso = ancho / (self.PROC_HISTORIA - 1)
+        coords = []
+        for i, v in enumerate(datos):
+            coords += [i * paso, alto - 4 - (alto - 18) * v / tope]
+        cv.coords(linea, *coords)
+        cv.itemconfigure(etiqueta, text=f"{datos[-1]:.0f} (máx {tope:.0f})")
+
     def on_close(self):
         try:
             self.gestor.detener()
         except Exception:
             pass
+        sys.stdout = self._stdout_original
         self.root.destroy()
 
 
@@ -0,0 +1,213 @@
+"""
+Módulo: instantanea.py
+Responsabilidad: guardar y restaurar el estado completo del sistema (memoria, procesos y
+disco virtual) en un archivo binario compacto.
+Contiene:
+- guardar(ruta, gestor, mem): escribe la instantánea (de forma atómica).
+- restaurar(ruta, gestor, mem): repone el estado en los objetos existentes.
+
+Formato (enteros little-endian):
+    MAGIC (8 bytes) | n secciones (<I) | n × (nombre <8s, offset <Q, largo <Q) | secciones
+Secciones:
+    META    JSON: frames, frame_size, cantidad de marcos guardados
+    OWNERS  pares int64 (marco, pid) de los marcos ocupados
+    MARCOS  int64 por marco guardado con su índice, seguido del contenido de esos marcos
+    PROCS   JSON de GestorProcesos.exportar_estado()
+    DISCO   JSON con las entradas del disco tal como se almacenan (ya comprimidas)
+
+Solo se guardan los marcos que no son ceros. Al restaurar, el archivo se abre con mmap y los
+marcos no se copian: la memoria los lee del mmap la primera vez que se usan, así que el costo
+de restaurar depende de los datos que se tocan después y no del tamaño de la memoria.
+
+Los procesos con instrucciones no serializables (p. ej. lambdas) o bloqueados en una primitiva
+de `sincronizacion` no se guardan; guardar() devuelve sus PIDs en "omitidos".
+
+Uso (desde el shell):
+    snapshot estado.snap
+    restore estado.snap
+"""
+import json
+import mmap
+import os
+import struct
+import sys
+import time
+from array import array
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+import archivos
+
+MAGIC = b"PSOSNAP\x01"
+_CABECERA = struct.Struct("<8sI")
+_ENTRADA = struct.Struct("<8sQQ")
+
+
+def _enteros(valores) -> bytes:
+    a = array("q", valores)
+    if sys.byteorder != "little":
+        a.byteswap()
+    return a.tobytes()
+
+
+def _leer_enteros(datos) -> array:
+    a = array("q")
+    a.frombytes(datos)
+    if sys.byteorder != "little":
+        a.byteswap()
+    return a
+
+
+def _json(obj) -> bytes:
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def guardar(ruta: str, gestor, mem) -> Dict:
+    """Escribe la instantánea en `ruta`. Devuelve bytes escritos, marcos, procesos y omitidos."""
+    t0 = time.perf_counter()
+    # gestor.lock primero, como el scheduler: memoria y procesos quedan consistentes entre sí
+    with gestor.lock:
+        estado_mem = mem.exportar_estado()
+        estado_procs, omitidos = gestor.exportar_estado()
+    disco = archivos.exportar_indice()
+
+    # Los marcos de procesos omitidos quedan libres en la instantánea
+    excluidos = set(omitidos)
+    owners = estado_mem["owners"]
+    ocupados = [(i, o) for i, o in enumerate(owners) if o is not None and o not in excluidos]
+    datos = estado_mem["datos"]
+    indices = sorted(i for i in datos if owners[i] not in excluidos)
+    secciones: List[Tuple[bytes, bytes]] = [
+        (b"META", _json({
+            "frames": estado_mem["frames"],
+            "frame_size": estado_mem["frame_size"],
+            "marcos": len(indices),
+        })),
+        (b"OWNERS", _enteros(v for par in ocupados for v in par)),
+        (b"MARCOS", _enteros(indices) + b"".join(datos[i] for i in indices)),
+        (b"PROCS", _json(estado_procs)),
+        (b"DISCO", _json(disco)),
+    ]
+
+    offset = _CABECERA.size + _ENTRADA.size * len(secciones)
+    tabla = []
+    for nombre, cuerpo in secciones:
+        tabla.append(_ENTRADA.pack(nombre, offset, len(cuerpo)))
+        offset += len(cuerpo)
+
+    destino = Path(ruta)
+    tmp = destino.with_name(destino.name + ".tmp")
+    with open(tmp, "wb") as f:
+        f.write(_CABECERA.pack(MAGIC, len(secciones)))
+        f.writelines(tabla)
+        for _, cuerpo in secciones:
+            f.write(cuerpo)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, destino)
+    return {
+        "bytes": offset,
+        "marcos": len(indices),
+        "procesos": len(estado_procs["procesos"]),
+        "omitidos": omitidos,
+        "segundos": time.perf_counter() - t0,
+    }
+
+
+def _secciones(mm) -> Dict[str, Tuple[int, int]]:
+    if len(mm) < _CABECERA.size:
+        raise ValueError("Archivo de instantánea truncado")
+    magic, n = _CABECERA.unpack_from(mm, 0)
+    if magic != MAGIC:
+        raise ValueError("No es una instantánea del prototipo (o es de otra versión)")
+    tabla = {}
+    for k in range(n):
+        nombre, off, largo = _ENTRADA.unpack_from(mm, _CABECERA.size + k * _ENTRADA.size)
+        if off + largo > len(mm):
+            raise ValueError("Archivo de instantánea truncado")
+        tabla[nombre.rstrip(b"\0").decode("ascii")] = (off, largo)
+    return tabla
+
+
+def _validar(meta: Dict, owners: Dict[int, int], offsets: Dict[int, int], fin_marcos: int,
+             largo: int, disco) -> None:
+    frames, frame_size = meta["frames"], meta["frame_size"]
+    if frames <= 0 or frame_size <= 0:
+        raise ValueError("Instantánea inválida: tamaño de memoria")
+    if fin_marcos > largo:
+        raise ValueError("Archivo de instantánea truncado")
+    if any(not 0 <= i < frames for i in owners) or any(pid < 0 for pid in owners.values()):
+        raise ValueError("Instantánea inválida: tabla de dueños")
+    if any(not 0 <= i < frames for i in offsets):
+        raise ValueError("Instantánea inválida: índice de marco")
+    if any(len(e) != 2 for e in disco):
+        raise ValueError("Instantánea inválida: entradas del disco")
+
+
+def restaurar(ruta: str, gestor, mem) -> Dict:
+    """Repone memoria, procesos y disco desde `ruta`. Los marcos se leen al usarlos.
+
+    Si el archivo no es válido lanza ValueError (o KeyError si falta una sección) sin
+    modificar memoria, procesos ni disco.
+    """
+    t0 = time.perf_counter()
+    with open(ruta, "rb") as f:
+        mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    try:
+        tabla = _secciones(mm)
+
+        def seccion(nombre: str):
+            off, largo = tabla[nombre]
+            return mm[off:off + largo]
+
+        meta = json.loads(seccion("META"))
+        estado_procs = json.loads(seccion("PROCS"))
+        disco = json.loads(seccion("DISCO"))
+        pares = _leer_enteros(seccion("OWNERS"))
+        owners = dict(zip(pares[0::2], pares[1::2]))
+        frame_size = meta["frame_size"]
+        off_marcos, _ = tabla["MARCOS"]
+        k = meta["marcos"]
+        indices = _leer_enteros(mm[off_marcos:off_marcos + 8 * k])
+        base = off_marcos + 8 * k
+        offsets = {i: base + j * frame_size for j, i in enumerate(indices)}
+        _validar(meta, owners, offsets, base + k * frame_size, len(mm), disco)
+        # Todo se decodifica antes de reemplazar nada: si algo falla, el sistema queda intacto
+        procs = gestor.preparar_estado(estado_procs)
+        entradas = [(str(nombre), str(contenido)) for nombre, contenido in disco]
+    except Exception:
+        mm.close()
+        raise
+
+    with gestor.lock:
+        mem.cargar_estado(meta["frames"], frame_size, owners, respaldo=mm, offsets=offsets)
+        gestor.aplicar_estado(procs)
+    archivos.cargar_indice(entradas)
+    return {
+        "marcos": k,
+        "procesos": len(estado_procs["procesos"]),
+        "archivos": len(disco),
+        "segundos": time.perf_counter() - t0,
+    }
+
+
+if __name__ == "__main__":
+    import tempfile
+
+    import memoria
+    import procesos
+
+    m = memoria.Memoria(frames=64, frame_size=256)
+    g = procesos.GestorProcesos(m, quantum=2)
+    p = g.crear_proceso("demo", [procesos.instruccion_imprimir_factory(f"paso {i}") for i in range(3)])
+    m.write(p.metadata['frames'][0], 0, b"hola")
+    with tempfile.TemporaryDirectory() as tmp:
+        archivos.DISCO_PATH = Path(tmp) / "disco.txt"  # no tocar el disco real
+        archivos.escribir_archivo("a.txt", "hola")
+        ruta = os.path.join(tmp, "estado.snap")
+        print("guardar:", guardar(ruta, g, m))
+        m2 = memoria.Memoria()
+        g2 = procesos.GestorProcesos(m2)
+        print("restaurar:", restaurar(ruta, g2, m2))
+        print("procesos:", g2.listar_procesos())
+        print("marco leído:", m2.read(p.metadata['frames'][0], 0, 4))
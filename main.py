@@ -2,29 +2,83 @@
 Archivo: main.py
 Punto de entrada del prototipo: inicializa memoria, gestor de procesos y shell.
 Use el flag --gui para abrir la interfaz Tkinter.
+
+Modo batch (sin prompt ni procesos demo), útil para CI y pruebas de carga:
+    python main.py --script comandos.txt      # '-' lee de stdin
+    python main.py --script - --latencias < comandos.txt
+--latencias imprime al salir un resumen de latencia por comando.
+--metricas activa el registro de métricas (ver comando `stats`); --metricas-archivo RUTA
+las vuelca al salir (JSON, o texto de Prometheus si la ruta termina en .prom).
+
+Modo servidor (varias sesiones concurrentes por socket, ver servidor.py):
+    python main.py --servidor [--puerto 7777 | --unix /tmp/prototipo.sock]
 """
+import argparse
 import sys
+import metricas
 import procesos
 import memoria
 import shell
 
-def main_cli():
-    g = procesos.GestorProcesos(quantum=2)
+def main_cli(script: str = None, latencias: bool = False) -> int:
+    m = memoria.Memoria(frames=32, frame_size=256)
+    g = procesos.GestorProcesos(m, quantum=2)
+    g.iniciar(demo=script is None)
+    errores = 0
+    try:
+        sh = shell.Shell(g, m, medir_latencias=latencias)
+        if script is None:
+            sh.start()
+        elif script == "-":
+            errores = sh.run_script(sys.stdin)
+        else:
+            with open(script, encoding="utf-8") as f:
+                errores = sh.run_script(f)
+        if latencias:
+            print(sh.resumen_latencias(), file=sys.stderr)
+    finally:
+        g.detener()
+    return 1 if errores else 0
+
+def main_servidor(puerto: int, unix_path: str = None):
+    import servidor
     m = memoria.Memoria(frames=32, frame_size=256)
-    g.iniciar()
+    g = procesos.GestorProcesos(m, quantum=2)
+    g.iniciar(demo=False)
     try:
-        sh = shell.Shell(g, m)
-        sh.start()
+        servidor.ServidorShell(g, m, puerto=puerto, unix_path=unix_path).servir()
     finally:
         g.detener()
 
 def main():
-    if "--gui" in sys.argv:
+    parser = argparse.ArgumentParser(description="Prototipo de sistema operativo")
+    parser.add_argument("--gui", action="store_true", help="abre la interfaz Tkinter")
+    parser.add_argument("--script", metavar="ARCHIVO", help="ejecuta los comandos del archivo ('-' = stdin) sin prompt")
+    parser.add_argument("--latencias", action="store_true", help="al salir, imprime latencia por comando")
+    parser.add_argument("--metricas", action="store_true", help="activa el registro de métricas")
+    parser.add_argument("--metricas-archivo", metavar="RUTA", help="al salir, vuelca las métricas (.json o .prom)")
+    parser.add_argument("--servidor", action="store_true", help="atiende sesiones de shell por socket")
+    parser.add_argument("--puerto", type=int, default=7777, help="puerto TCP del servidor (localhost)")
+    parser.add_argument("--unix", metavar="RUTA", help="socket Unix del servidor en lugar de TCP")
+    args = parser.parse_args()
+    if args.metricas or args.metricas_archivo:
+        metricas.habilitar(True)
+    try:
+        _ejecutar_modo(args)
+    finally:
+        if args.metricas_archivo:
+            formato = "prom" if args.metricas_archivo.endswith(".prom") else "json"
+            metricas.volcar(args.metricas_archivo, formato)
+
+def _ejecutar_modo(args):
+    if args.gui:
         # Cargar la GUI
         from gui import main as gui_main
         gui_main()
+    elif args.servidor:
+        main_servidor(args.puerto, args.unix)
     else:
-        main_cli()
+        sys.exit(main_cli(args.script, args.latencias))
 
 if __name__ == "__main__":
     main()
@@ -4,11 +4,54 @@ Responsabilidad: simular una memoria principal simple con marcos (frames)
 Proporciona:
 - Clase Memoria: gestionar lectura/escritura, asignación de bloques.
 - Manejo básico de direcciones virtuales (simple offset)
+- Contador de cambios (version) y cambios_desde(version) para que las vistas
+  (p. ej. la GUI) actualicen solo los marcos cuyo dueño cambió.
+- exportar_estado()/cargar_estado() para instantáneas (ver instantanea.py). Los marcos se
+  crean al primer acceso, y tras restaurar se leen del respaldo (mmap) solo si se tocan.
 
 Diseño educativo: no pretende ser una implementación completa de paginación.
 """
-from typing import Dict, Optional
+from collections import deque
+from typing import Deque, Dict, Optional, Tuple
 import threading
+import time
+
+import metricas
+
+
+class _Marcos(dict):
+    """frame_index -> bytearray, creado al primer acceso.
+
+    Un marco ausente vale ceros; si hay respaldo (p. ej. un mmap de una instantánea) y el
+    marco figura en él, se copia de ahí la primera vez que se usa.
+    """
+
+    def __init__(self, frame_size: int, respaldo=None, offsets: Optional[Dict[int, int]] = None):
+        super().__init__()
+        self.frame_size = frame_size
+        self._respaldo = respaldo
+        self._offsets = offsets or {}
+
+    def __missing__(self, i: int) -> bytearray:
+        off = self._offsets.pop(i, None)
+        if off is None:
+            buf = bytearray(self.frame_size)
+        else:
+            buf = bytearray(self._respaldo[off:off + self.frame_size])
+            if not self._offsets:
+                self._respaldo = None  # ya no se necesita (el mmap se cierra al liberarse)
+        self[i] = buf
+        return buf
+
+    def limpiar(self, i: int):
+        """Deja el marco en ceros sin reservar memoria."""
+        self.pop(i, None)
+        self._offsets.pop(i, None)
+
+    def pendientes(self) -> int:
+        """Marcos del respaldo que aún no se han leído."""
+        return len(self._offsets)
+
 
 class Memoria:
     """Simula memoria física dividida en marcos de tamaño fijo."""
@@ -16,44 +59,70 @@ class Memoria:
     def __init__(self, frames: int = 32, frame_size: int = 256):
         self.frames = frames
         self.frame_size = frame_size
-        # Memoria real representada como diccionario: frame_index -> bytes
-        self._mem: Dict[int, bytearray] = {i: bytearray(frame_size) for i in range(frames)}
+        # Memoria real representada como diccionario: frame_index -> bytes (perezoso)
+        self._mem: _Marcos = _Marcos(frame_size)
         # Tabla de ocupación simple: frame_index -> pid (None si libre)
         self._owner: Dict[int, Optional[int]] = {i: None for i in range(frames)}
         self._lock = threading.RLock()
+        # Cada cambio de dueño incrementa version y queda en un registro acotado
+        self.version = 0
+        self._usados = 0  # marcos ocupados (evita recorrer _owner en status())
+        self._cambios: Deque[Tuple[int, int, Optional[int]]] = deque(maxlen=max(1024, 2 * frames))
+
+    def _registrar_cambio(self, frame_index: int, owner: Optional[int]):
+        self.version += 1
+        self._cambios.append((self.version, frame_index, owner))
 
     def status(self) -> Dict[str, int]:
         """Devuelve estadísticas básicas de la memoria."""
         with self._lock:
-            used = sum(1 for v in self._owner.values() if v is not None)
+            used = self._usados
             free = self.frames - used
             return {"frames_total": self.frames, "frames_used": used, "frames_free": free, "frame_size": self.frame_size}
 
     def allocate_frames(self, pid: int, count: int) -> Optional[list]:
         """Asigna `count` marcos al proceso pid. Devuelve la lista de índices o None si no hay suficiente espacio."""
+        medir = metricas.activo
+        t0 = time.perf_counter() if medir else 0.0
         with self._lock:
-            free_frames = [i for i, owner in self._owner.items() if owner is None]
-            if len(free_frames) < count:
-                return None
-            allocated = free_frames[:count]
-            for i in allocated:
-                self._owner[i] = pid
-                # Limpia el contenido
-                self._mem[i] = bytearray(self.frame_size)
-            return allocated
+            t1 = time.perf_counter() if medir else 0.0
+            try:
+                free_frames = [i for i, owner in self._owner.items() if owner is None]
+                if len(free_frames) < count:
+                    return None
+                allocated = free_frames[:count]
+                self._usados += len(allocated)
+                for i in allocated:
+                    self._owner[i] = pid
+                    self._registrar_cambio(i, pid)
+                    # Limpia el contenido
+                    self._mem.limpiar(i)
+                return allocated
+            finally:
+                if medir:
+                    metricas.observar_lock("memoria.allocate_frames", t0, t1)
+                    metricas.fijar("memoria.frames_usados", self._usados)
 
     def free_frames(self, pid: int) -> None:
         """Libera todos los marcos pertenecientes al pid."""
+        medir = metricas.activo
+        t0 = time.perf_counter() if medir else 0.0
         with self._lock:
+            t1 = time.perf_counter() if medir else 0.0
             for i, owner in list(self._owner.items()):
                 if owner == pid:
                     self._owner[i] = None
-                    self._mem[i] = bytearray(self.frame_size)
+                    self._usados -= 1
+                    self._registrar_cambio(i, None)
+                    self._mem.limpiar(i)
+            if medir:
+                metricas.observar_lock("memoria.free_frames", t0, t1)
+                metricas.fijar("memoria.frames_usados", self._usados)
 
     def write(self, frame_index: int, offset: int, data: bytes) -> bool:
         """Escribe `data` en el frame y offset dado. Devuelve False si se sale de límites."""
         with self._lock:
-            if frame_index not in self._mem:
+            if frame_index not in self._owner:
                 return False
             if offset < 0 or offset + len(data) > self.frame_size:
                 return False
@@ -62,7 +131,7 @@ class Memoria:
 
     def read(self, frame_index: int, offset: int, size: int) -> Optional[bytes]:
         with self._lock:
-            if frame_index not in self._mem:
+            if frame_index not in self._owner:
                 return None
             if offset < 0 or offset + size > self.frame_size:
                 return None
@@ -73,10 +142,63 @@ class Memoria:
         with self._lock:
             return dict(self._owner)
 
+    def exportar_estado(self) -> Dict:
+        """Estado serializable: dueños por marco y contenido de los marcos que no son ceros."""
+        with self._lock:
+            datos = {}
+            for i in range(self.frames):
+                if i in self._mem or i in self._mem._offsets:
+                    buf = self._mem[i]
+                    if buf.count(0) != len(buf):
+                        datos[i] = bytes(buf)
+            return {
+                "frames": self.frames,
+                "frame_size": self.frame_size,
+                "owners": [self._owner[i] for i in range(self.frames)],
+                "datos": datos,
+            }
+
+    def cargar_estado(self, frames: int, frame_size: int, owners: Dict[int, int], respaldo=None,
+                      offsets: Optional[Dict[int, int]] = None) -> None:
+        """Reemplaza el estado.
+
+        owners: {marco: pid} solo de los marcos ocupados. `respaldo[offsets[i]:...]` tiene el
+        contenido del marco i; se copia recién cuando el marco se usa.
+        """
+        with self._lock:
+            self.frames = frames
+            self.frame_size = frame_size
+            self._mem = _Marcos(frame_size, respaldo, dict(offsets or {}))
+            self._owner = dict.fromkeys(range(frames))
+            self._owner.update(owners)
+            self._usados = len(owners)
+            # Las vistas incrementales deben releer todo
+            self.version += 1
+            self._cambios = deque(maxlen=max(1024, 2 * frames))
+
+    def cambios_desde(self, version: int) -> Tuple[int, Optional[Dict[int, Optional[int]]]]:
+        """Devuelve (version_actual, {frame: dueño}) con los marcos que cambiaron después de `version`.
+
+        Si el registro ya no llega tan atrás devuelve (version_actual, None): hay que
+        releer todo con frame_owners().
+        """
+        with self._lock:
+            if version >= self.version:
+                return self.version, {}
+            if version < 0 or not self._cambios or self._cambios[0][0] > version + 1:
+                return self.version, None
+            cambios: Dict[int, Optional[int]] = {}
+            for v, i, owner in reversed(self._cambios):
+                if v <= version:
+                    break
+                cambios.setdefault(i, owner)  # gana el cambio más reciente
+            return self.version, cambios
+
 if __name__ == "__main__":
     m = Memoria(frames=8, frame_size=64)
     print(m.status())
     print("Asignando 3 marcos a pid=1 ->", m.allocate_frames(1, 3))
     print(m.status())
     m.free_frames(1)
-    print(m.status())
\ No newline at end of file
+    print(m.status())
+    print("Cambios desde version 0 ->", m.cambios_desde(0))
\ No newline at end of file
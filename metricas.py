@@ -0,0 +1,216 @@
+"""
+Módulo: metricas.py
+Responsabilidad: registro ligero de métricas del prototipo.
+Contiene:
+- Clase Contador, Gauge, Histograma (buckets fijos)
+- Registro global: contador(), gauge(), histograma() (obtener o crear por nombre)
+- Atajos: incrementar(), fijar(), observar(), observar_lock()
+- Exportación: snapshot(), a_json(), a_prometheus(), volcar(ruta, formato)
+- percentil(): percentil de una lista ordenada (el mismo en benchmarks, shell y servidor)
+
+Las métricas están desactivadas por defecto (habilitar()). Los módulos instrumentados
+comprueban `metricas.activo` antes de medir, así que desactivadas cuestan una lectura de
+atributo por punto de medición.
+"""
+import json
+import math
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Tuple, Union
+
+activo = False
+
+# Límites superiores (segundos) de los buckets de latencia
+LIMITES_LATENCIA = (1e-5, 5e-5, 1e-4, 5e-4, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0)
+
+
+class Contador:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.valor = 0
+
+    def inc(self, n: int = 1):
+        with self._lock:
+            self.valor += n
+
+
+class Gauge:
+    def __init__(self):
+        self.valor = 0.0
+
+    def set(self, v: float):
+        self.valor = v
+
+
+class Histograma:
+    """Histograma de buckets fijos (límites superiores en segundos)."""
+
+    LIMITES = LIMITES_LATENCIA
+
+    def __init__(self, limites: Tuple[float, ...] = LIMITES):
+        self.limites = tuple(limites)
+        self.conteos = [0] * (len(self.limites) + 1)  # el último bucket es +inf
+        self.total = 0
+        self.suma = 0.0
+        self._lock = threading.Lock()
+
+    def observar(self, valor: float):
+        i = 0
+        for limite in self.limites:
+            if valor <= limite:
+                break
+            i += 1
+        with self._lock:
+            self.conteos[i] += 1
+            self.total += 1
+            self.suma += valor
+
+    def as_dict(self) -> Dict:
+        with self._lock:
+            buckets = {str(l): c for l, c in zip(self.limites, self.conteos)}
+            buckets["+inf"] = self.conteos[-1]
+            return {"total": self.total, "suma": self.suma, "buckets": buckets}
+
+
+Metrica = Union[Contador, Gauge, Histograma]
+_registro: Dict[str, Metrica] = {}
+_registro_lock = threading.Lock()
+
+
+def _obtener(nombre: str, tipo):
+    m = _registro.get(nombre)
+    if m is None:
+        with _registro_lock:
+            m = _registro.get(nombre)
+            if m is None:
+                m = _registro[nombre] = tipo()
+    if not isinstance(m, tipo):
+        raise TypeError(f"La métrica {nombre} ya existe como {type(m).__name__}")
+    return m
+
+
+def contador(nombre: str) -> Contador:
+    return _obtener(nombre, Contador)
+
+
+def gauge(nombre: str) -> Gauge:
+    return _obtener(nombre, Gauge)
+
+
+def histograma(nombre: str) -> Histograma:
+    return _obtener(nombre, Histograma)
+
+
+def incrementar(nombre: str, n: int = 1):
+    contador(nombre).inc(n)
+
+
+def fijar(nombre: str, valor: float):
+    gauge(nombre).set(valor)
+
+
+def observar(nombre: str, segundos: float):
+    histograma(nombre).observar(segundos)
+
+
+def observar_lock(nombre: str, t_pedido: float, t_obtenido: float):
+    """Registra espera (pedido -> obtenido) y retención (obtenido -> ahora) de un lock."""
+    ahora = time.perf_counter()
+    histograma(nombre + ".espera").observar(t_obtenido - t_pedido)
+    histograma(nombre + ".retencion").observar(ahora - t_obtenido)
+
+
+def percentil(ordenados: List[float], p: float) -> float:
+    """Percentil `p` (0-1) por rango más cercano de una lista ya ordenada; 0.0 si está vacía."""
+    if not ordenados:
+        return 0.0
+    return ordenados[min(len(ordenados) - 1, max(0, math.ceil(p * len(ordenados)) - 1))]
+
+
+def habilitar(valor: bool = True):
+    global activo
+    activo = valor
+
+
+def reiniciar():
+    """Borra todas las métricas registradas."""
+    with _registro_lock:
+        _registro.clear()
+
+
+def snapshot() -> Dict[str, Dict]:
+    """Copia de todas las métricas: {"contadores": {...}, "gauges": {...}, "histogramas": {...}}."""
+    with _registro_lock:
+        items = sorted(_registro.items())
+    out = {"contadores": {}, "gauges": {}, "histogramas": {}}
+    for nombre, m in items:
+        if isinstance(m, Contador):
+            out["contadores"][nombre] = m.valor
+        elif isinstance(m, Gauge):
+            out["gauges"][nombre] = m.valor
+        else:
+            out["histogramas"][nombre] = m.as_dict()
+    return out
+
+
+def a_json() -> str:
+    return json.dumps(snapshot(), indent=2, ensure_ascii=False)
+
+
+def _nombre_prom(nombre: str) -> str:
+    limpio = "".join(c if c.isalnum() else "_" for c in nombre)
+    return f"prototipo_{limpio}"
+
+
+def a_prometheus() -> str:
+    """Formato de texto de Prometheus (histogramas con buckets acumulados)."""
+    snap = snapshot()
+    lineas = []
+    for nombre, v in snap["contadores"].items():
+        n = _nombre_prom(nombre) + "_total"
+        lineas += [f"# TYPE {n} counter", f"{n} {v}"]
+    for nombre, v in snap["gauges"].items():
+        n = _nombre_prom(nombre)
+        lineas += [f"# TYPE {n} gauge", f"{n} {v}"]
+    for nombre, h in snap["histogramas"].items():
+        n = _nombre_prom(nombre) + "_seconds"
+        lineas.append(f"# TYPE {n} histogram")
+        acumulado = 0
+        for le, c in h["buckets"].items():
+            acumulado += c
+            le = "+Inf" if le == "+inf" else le
+            lineas.append(f'{n}_bucket{{le="{le}"}} {acumulado}')
+        lineas += [f"{n}_sum {h['suma']}", f"{n}_count {h['total']}"]
+    return "\n".join(lineas) + "\n"
+
+
+def volcar(ruta: str, formato: str = "json"):
+    """Escribe las métricas en `ruta` en formato "json" o "prom"."""
+    if formato not in ("json", "prom"):
+        raise ValueError(f"Formato desconocido: {formato}")
+    Path(ruta).write_text(a_json() if formato == "json" else a_prometheus())
+
+
+def resumen() -> str:
+    """Texto legible para el comando `stats` del shell."""
+    snap = snapshot()
+    lineas = []
+    for nombre, v in snap["contadores"].items():
+        lineas.append(f"{nombre:40} {v}")
+    for nombre, v in snap["gauges"].items():
+        lineas.append(f"{nombre:40} {v:g}")
+    for nombre, h in snap["histogramas"].items():
+        if not h["total"]:
+            continue
+        media = h["suma"] / h["total"] * 1e6
+        # percentil 99 aproximado: primer bucket que acumula el 99% de las muestras
+        acumulado, p99 = 0, "+inf"
+        for le, c in h["buckets"].items():
+            acumulado += c
+            if acumulado >= 0.99 * h["total"]:
+                p99 = le
+                break
+        p99_txt = p99 if p99 == "+inf" else f"{float(p99) * 1e6:g}us"
+        lineas.append(f"{nombre:40} n={h['total']} media={media:.1f}us p99<={p99_txt}")
+    return "\n".join(lineas) if lineas else "Sin métricas registradas."
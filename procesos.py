@@ -7,21 +7,62 @@ Componentes:
 
 Se usa una cola de listos (ready). El scheduler ejecuta "quantum" instrucciones por proceso.
 Fixes: Crea 3 procesos demo en iniciar(), integra con Memoria, estados en español.
+Bloqueo: las primitivas de `sincronizacion` (SemaforoProc, MutexProc, ...) llaman a
+bloquear()/desbloquear(); un proceso bloqueado sale de la cola de listos hasta que lo despierten.
+Vistas: snapshot(desde) devuelve solo los procesos que cambiaron después de una versión
+(cada fila se construye una vez por cambio) y metricas() da contadores baratos.
+Instantáneas: las instrucciones registradas en INSTRUCCIONES se pueden serializar como
+[tipo, args...]; exportar_estado()/cargar_estado() guardan y reponen PCBs y colas
+(cargar_estado = preparar_estado, que valida, + aplicar_estado, que reemplaza).
 """
 import threading
 import itertools
 import time
-from collections import deque
-from typing import Callable, Deque, Dict, List, Optional
+from collections import OrderedDict, deque
+from typing import Callable, Deque, Dict, List, Optional, Tuple
+
+import metricas
+
+
+class InstruccionImprimir:
+    """Instrucción demo: imprime un mensaje. Serializable como ["imprimir", mensaje]."""
+    tipo = "imprimir"
+
+    def __init__(self, mensaje: str):
+        self.mensaje = mensaje
+
+    def __call__(self, proceso: "Proceso"):
+        print(f"[Proceso {proceso.pid} - {proceso.nombre}] {self.mensaje}")
+
+    def a_spec(self) -> list:
+        return [self.tipo, self.mensaje]
+
+
+# tipo -> clase; cada clase se construye con los argumentos de su spec
+INSTRUCCIONES = {InstruccionImprimir.tipo: InstruccionImprimir}
+
+
+def instruccion_a_spec(instr) -> Optional[list]:
+    """[tipo, args...] de una instrucción serializable, o None si no lo es (p. ej. una lambda)."""
+    a_spec = getattr(instr, "a_spec", None)
+    return a_spec() if a_spec is not None and getattr(instr, "tipo", None) in INSTRUCCIONES else None
+
+
+def instruccion_desde_spec(spec: list):
+    clase = INSTRUCCIONES.get(spec[0])
+    if clase is None:
+        raise ValueError(f"Tipo de instrucción desconocido: {spec[0]!r}")
+    return clase(*spec[1:])
+
 
 # Factory para instrucciones demo (tu original)
 def instruccion_imprimir_factory(mensaje: str):
-    def instr(proceso: Proceso):
-        print(f"[Proceso {proceso.pid} - {proceso.nombre}] {mensaje}")
-    return instr
+    return InstruccionImprimir(mensaje)
 
 class Proceso:
     _pid_iter = itertools.count(1)
+    # Segundos simulados por instrucción (0 en benchmarks para medir solo el scheduler)
+    TIEMPO_INSTRUCCION = 0.5
 
     def __init__(self, nombre: str, instrucciones: Optional[List[Callable]] = None, tiempo_total: float = 0.0):
         self.pid = next(Proceso._pid_iter)
@@ -31,6 +72,7 @@ class Proceso:
         self.estado = "listo"  # listo, ejecutando, bloqueado, terminado (español para GUI)
         self.tiempo_total = tiempo_total
         self.metadata = {}
+        self._fila: Optional[Dict] = None  # cache de la fila para snapshot()
 
     def ejecutar_instruccion(self):
         """Ejecuta la instrucción actual. Simula tiempo."""
@@ -44,8 +86,9 @@ class Proceso:
             self.estado = "terminado"
             return False
         self.pc += 1
-        time.sleep(0.5)  # Simula CPU time (visibilidad en logs/GUI)
-        self.tiempo_total += 0.5
+        if self.TIEMPO_INSTRUCCION:
+            time.sleep(self.TIEMPO_INSTRUCCION)  # Simula CPU time (visibilidad en logs/GUI)
+        self.tiempo_total += self.TIEMPO_INSTRUCCION
         return True
 
     def is_finished(self) -> bool:
@@ -63,12 +106,20 @@ class GestorProcesos:
         self.lock = threading.RLock()
         self._running = False
         self._scheduler_thread: Optional[threading.Thread] = None
+        self.detector_interbloqueo = None  # sincronizacion.DetectorInterbloqueo (opcional)
+        # Versionado para snapshot(): pid -> versión de su último cambio, en orden de cambio
+        self.version = 0
+        self._cambios: "OrderedDict[int, int]" = OrderedDict()
+        self.instrucciones = 0
+        self._finalizados = set()  # pids ya contados como terminados
+        self.epoca = 0  # sube con cada cargar_estado(): las vistas deben releer todo
 
     def crear_proceso(self, nombre: str, instrucciones: Optional[List[Callable]] = None) -> Proceso:
         with self.lock:
             p = Proceso(nombre, instrucciones)
             self.ready_queue.append(p)
             self._all_procesos[p.pid] = p
+            self._tocar(p)
             # Asigna memoria (4 frames)
             asignados = self.mem.allocate_frames(p.pid, 4)
             if asignados:
@@ -83,21 +134,172 @@ class GestorProcesos:
             return [{"pid": p.pid, "nombre": p.nombre, "estado": p.estado, "pc": p.pc} 
                     for p in self._all_procesos.values()]
 
+    def _tocar(self, p: Proceso) -> None:
+        """Registra que el proceso cambió (llamar con self.lock tomado)."""
+        self.version += 1
+        self._cambios[p.pid] = self.version
+        self._cambios.move_to_end(p.pid)
+        p._fila = None
+
+    def snapshot(self, desde: int = 0) -> Tuple[int, List[Dict]]:
+        """Devuelve (version, filas) con los procesos que cambiaron después de `desde`.
+
+        Con desde=0 devuelve todos. Las filas (pid, nombre, estado, pc, cpu, frames) se
+        comparten entre llamadas: no modificarlas.
+        """
+        with self.lock:
+            filas = []
+            for pid in reversed(self._cambios):
+                if self._cambios[pid] <= desde:
+                    break
+                p = self._all_procesos[pid]
+                if p._fila is None:
+                    p._fila = {"pid": p.pid, "nombre": p.nombre, "estado": p.estado, "pc": p.pc,
+                               "cpu": p.tiempo_total, "frames": len(p.metadata.get('frames') or ())}
+                filas.append(p._fila)
+            return self.version, filas
+
+    def metricas(self) -> Dict[str, int]:
+        """Contadores baratos para paneles: cola de listos, procesos, instrucciones, terminados y época."""
+        with self.lock:
+            return {"listos": len(self.ready_queue), "procesos": len(self._all_procesos),
+                    "instrucciones": self.instrucciones, "terminados": len(self._finalizados),
+                    "epoca": self.epoca}
+
     def terminar_proceso(self, pid: int) -> bool:
         with self.lock:
             if pid in self._all_procesos:
                 p = self._all_procesos[pid]
                 p.estado = "terminado"
+                self._finalizados.add(pid)
+                self._tocar(p)
                 try:
                     self.ready_queue.remove(p)
                 except ValueError:
                     pass
+                self._soltar_primitivas(p)
                 self.mem.free_frames(pid)  # Libera memoria
+                p.metadata.pop('frames', None)
                 print(f"Proceso PID {pid} terminado y memoria liberada.")
                 return True
         print(f"PID {pid} no encontrado.")
         return False
 
+    def _soltar_primitivas(self, p: Proceso) -> None:
+        """Saca a `p` de la espera en curso y suelta lo que tenga tomado (con self.lock tomado)."""
+        primitiva = p.metadata.pop('bloqueado_en', None)
+        if primitiva is not None:
+            primitiva._cancelar(p)
+        for primitiva in list(p.metadata.pop('recursos', ())):
+            primitiva._liberar(p)  # Despierta a quien esperaba lo que tenía
+
+    def exportar_estado(self) -> Tuple[Dict, List[int]]:
+        """Estado serializable del gestor y PIDs omitidos.
+
+        Se omiten procesos con instrucciones no serializables o bloqueados en una primitiva.
+        Los programas compartidos entre procesos se guardan una sola vez.
+        """
+        with self.lock:
+            programas: List[list] = []
+            indice_prog: Dict[int, int] = {}
+            procs, omitidos = [], []
+            for p in self._all_procesos.values():
+                clave = id(p.instrucciones)
+                if clave not in indice_prog:
+                    specs = [instruccion_a_spec(i) for i in p.instrucciones]
+                    indice_prog[clave] = -1 if any(s is None for s in specs) else len(programas)
+                    if indice_prog[clave] >= 0:
+                        programas.append(specs)
+                if indice_prog[clave] < 0 or p.estado == "bloqueado":
+                    omitidos.append(p.pid)
+                    continue
+                procs.append({
+                    "pid": p.pid, "nombre": p.nombre, "pc": p.pc, "tiempo_total": p.tiempo_total,
+                    # el que estaba en CPU vuelve como listo
+                    "estado": "listo" if p.estado == "ejecutando" else p.estado,
+                    "frames": p.metadata.get('frames'), "programa": indice_prog[clave],
+                })
+            guardados = {d["pid"] for d in procs}
+            ready = [p.pid for p in self.ready_queue if p.pid in guardados]
+            ready += [d["pid"] for d in procs if d["estado"] == "listo" and d["pid"] not in ready]
+            return {
+                "quantum": self.quantum,
+                "programas": programas,
+                "procesos": procs,
+                "ready": ready,
+                "instrucciones": self.instrucciones,
+                "finalizados": sorted(self._finalizados & guardados),
+            }, omitidos
+
+    @staticmethod
+    def preparar_estado(estado: Dict) -> Dict:
+        """Decodifica y valida `estado` (ver exportar_estado) sin tocar el gestor.
+
+        Lanza ValueError si el estado no es válido (p. ej. un tipo de instrucción desconocido).
+        El resultado se aplica con aplicar_estado().
+        """
+        try:
+            programas = [[instruccion_desde_spec(s) for s in prog] for prog in estado["programas"]]
+            nuevos: Dict[int, Proceso] = {}
+            for d in estado["procesos"]:
+                p = Proceso.__new__(Proceso)
+                p.pid = int(d["pid"])
+                p.nombre = d["nombre"]
+                p.instrucciones = programas[d["programa"]]
+                p.pc = d["pc"]
+                p.estado = d["estado"]
+                p.tiempo_total = d["tiempo_total"]
+                p.metadata = {'frames': d["frames"]} if d["frames"] else {}
+                p._fila = None
+                nuevos[p.pid] = p
+            return {
+                "procesos": nuevos,
+                "ready": [nuevos[pid] for pid in estado["ready"]],
+                "quantum": int(estado["quantum"]),
+                "instrucciones": int(estado["instrucciones"]),
+                "finalizados": set(estado["finalizados"]),
+            }
+        except (KeyError, IndexError, TypeError, ValueError) as e:
+            raise ValueError(f"Estado de procesos inválido: {e!r}") from e
+
+    def aplicar_estado(self, preparado: Dict) -> None:
+        """Reemplaza procesos y colas por un estado ya validado con preparar_estado()."""
+        with self.lock:
+            nuevos = preparado["procesos"]
+            self.quantum = preparado["quantum"]
+            self._all_procesos = nuevos
+            self.ready_queue = deque(preparado["ready"])
+            self.instrucciones = preparado["instrucciones"]
+            self._finalizados = preparado["finalizados"]
+            self._cambios = OrderedDict()
+            self.epoca += 1
+            for p in nuevos.values():
+                self._tocar(p)
+            # Los PIDs nuevos siguen después de los restaurados
+            siguiente = max([next(Proceso._pid_iter)] + [pid + 1 for pid in nuevos])
+            Proceso._pid_iter = itertools.count(siguiente)
+
+    def cargar_estado(self, estado: Dict) -> None:
+        """Reemplaza procesos y colas por los de `estado` (ver exportar_estado)."""
+        self.aplicar_estado(self.preparar_estado(estado))
+
+    def bloquear(self, p: Proceso, primitiva) -> None:
+        """Marca el proceso como bloqueado en `primitiva` (no vuelve a la cola de listos)."""
+        with self.lock:
+            p.estado = "bloqueado"
+            p.metadata['bloqueado_en'] = primitiva
+            self._tocar(p)
+
+    def desbloquear(self, p: Proceso) -> None:
+        """Devuelve un proceso bloqueado a la cola de listos."""
+        with self.lock:
+            p.metadata.pop('bloqueado_en', None)
+            if p.estado != "bloqueado":
+                return  # terminado mientras esperaba
+            p.estado = "listo"
+            self.ready_queue.append(p)
+            self._tocar(p)
+
     def _schedule_once(self):
         with self.lock:
             if not self.ready_queue:
@@ -106,30 +308,53 @@ class GestorProcesos:
             if p.estado == "terminado":
                 return
             p.estado = "ejecutando"
+            self._tocar(p)
         # Ejecuta quantum
+        medir = metricas.activo
+        t0 = time.perf_counter() if medir else 0.0
+        ejecutadas = 0
         for _ in range(self.quantum):
-            if p.is_finished():
+            if p.is_finished() or p.estado != "ejecutando":
                 break
             p.ejecutar_instruccion()
+            ejecutadas += 1
         with self.lock:
+            if self._all_procesos.get(p.pid) is not p:
+                return  # cargar_estado() reemplazó los procesos durante el quantum
+            self.instrucciones += ejecutadas
+            self._tocar(p)
+            if medir:
+                metricas.observar("scheduler.quantum", time.perf_counter() - t0)
+                metricas.incrementar("scheduler.despachos")
+                metricas.incrementar("scheduler.instrucciones", ejecutadas)
+                metricas.fijar("scheduler.listos", len(self.ready_queue))
+            if p.estado == "bloqueado":
+                print(f"[Scheduler] Proceso {p.pid} bloqueado (PC: {p.pc})")
+                return
             if p.is_finished():
+                # Fin del programa o instrucción fallida: lo que quedó tomado se suelta igual
+                # que en terminar_proceso, si no sus esperas quedarían bloqueadas para siempre
                 p.estado = "terminado"
-            else:
+                self._finalizados.add(p.pid)
+                self._soltar_primitivas(p)
+            elif p.estado == "ejecutando":
                 p.estado = "listo"
                 self.ready_queue.append(p)
             print(f"[Scheduler] Proceso {p.pid} pausado (PC: {p.pc})")
 
-    def iniciar(self):
+    def iniciar(self, demo: bool = True):
+        """Arranca el scheduler. Con demo=False no crea los 3 procesos de ejemplo (modo batch)."""
         if self._running:
             return
         self._running = True
-        # Crea 3 procesos demo automáticamente
-        def instr_demo(proceso: Proceso):
-            print(f"[Proceso {proceso.pid} - {proceso.nombre}] Ejecutando instrucción {proceso.pc + 1}/10")
-        instr_list = [instruccion_imprimir_factory(f"Ejecutando...") for _ in range(10)]  # 10 instr cada uno
-        for i, nombre in enumerate(["Proceso1", "Proceso2", "Proceso3"], 1):
-            self.crear_proceso(nombre, instr_list)
-        print("Gestor iniciado con 3 procesos demo. Alternancia comienza...")
+        if demo:
+            # Crea 3 procesos demo automáticamente
+            def instr_demo(proceso: Proceso):
+                print(f"[Proceso {proceso.pid} - {proceso.nombre}] Ejecutando instrucción {proceso.pc + 1}/10")
+            instr_list = [instruccion_imprimir_factory(f"Ejecutando...") for _ in range(10)]  # 10 instr cada uno
+            for i, nombre in enumerate(["Proceso1", "Proceso2", "Proceso3"], 1):
+                self.crear_proceso(nombre, instr_list)
+            print("Gestor iniciado con 3 procesos demo. Alternancia comienza...")
 
         def loop():
             while self._running:
@@ -0,0 +1,265 @@
+"""
+Módulo: servidor.py
+Responsabilidad: exponer el shell del prototipo a varios clientes simultáneos por socket
+(TCP en localhost o socket Unix).
+Contiene:
+- class ServidorShell: acepta sesiones (un hilo por sesión), cada una con su propio Shell
+  sobre el mismo GestorProcesos y Memoria.
+- class ClienteShell: cliente mínimo (ejecutar una línea y recibir su salida).
+- generar_carga(): abre N sesiones concurrentes y mide throughput y latencias.
+
+Protocolo: el cliente envía una línea de comando (UTF-8, terminada en '\\n'); el servidor
+responde con la salida del comando seguida de una línea con el carácter FIN ('\\x04').
+
+La salida de cada sesión se captura con un stdout por hilo (shell.SalidaPorHilo), instalado una
+sola vez, en lugar de `redirect_stdout`, que cambia sys.stdout para todo el proceso y mezclaría
+la salida de sesiones concurrentes.
+
+Uso:
+    python main.py --servidor [--puerto 7777 | --unix /tmp/prototipo.sock]
+    python servidor.py cliente [--puerto 7777 | --unix ...]
+    python servidor.py carga -n 50 -r 200 -c "ls" [--puerto 7777 | --unix ...]
+"""
+import argparse
+import os
+import socket
+import socketserver
+import sys
+import threading
+import time
+from typing import Dict, List, Optional
+
+import metricas
+import shell
+
+FIN = "\x04"
+PUERTO_DEFECTO = 7777
+
+
+class _SesionHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        srv: "ServidorShell" = self.server.servidor_shell
+        sh = shell.Shell(srv.gestor, srv.mem, medir_latencias=True)
+        srv._abrir_sesion()
+        try:
+            for raw in self.rfile:
+                linea = raw.decode("utf-8", "replace").rstrip("\r\n")
+                with srv.salida.capturar() as buf:
+                    sh.run_script([linea])
+                out = buf.getvalue()
+                if out and not out.endswith("\n"):
+                    out += "\n"
+                self.wfile.write((out + FIN + "\n").encode("utf-8"))
+                if not sh._running:
+                    break  # exit/salir cierra la sesión
+        except (ConnectionError, OSError):
+            pass
+        finally:
+            srv._cerrar_sesion(sh)
+
+
+class _TCPServer(socketserver.ThreadingMixIn, socketserver.TCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+if hasattr(socketserver, "UnixStreamServer"):
+    class _UnixServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+        daemon_threads = True
+else:  # Windows
+    _UnixServer = None
+
+
+class ServidorShell:
+    """Servidor de sesiones de shell concurrentes.
+
+    Con unix_path usa un socket Unix; si no, TCP en host:puerto (puerto 0 = uno libre).
+    """
+
+    def __init__(self, gestor, mem, host: str = "127.0.0.1", puerto: int = PUERTO_DEFECTO,
+                 unix_path: Optional[str] = None):
+        self.gestor = gestor
+        self.mem = mem
+        self.salida = shell.SalidaPorHilo(sys.stdout)
+        self.unix_path = unix_path
+        if unix_path:
+            if _UnixServer is None:
+                raise RuntimeError("Sockets Unix no disponibles en esta plataforma")
+            self._server = _UnixServer(unix_path, _SesionHandler)
+        else:
+            self._server = _TCPServer((host, puerto), _SesionHandler)
+        self._server.servidor_shell = self
+        self.direccion = self._server.server_address
+        self._lock = threading.Lock()
+        self.sesiones_activas = 0
+        self.sesiones_totales = 0
+        self.comandos = 0
+        self._thread: Optional[threading.Thread] = None
+        self._stdout_original = None
+
+    def _abrir_sesion(self):
+        with self._lock:
+            self.sesiones_activas += 1
+            self.sesiones_totales += 1
+
+    def _cerrar_sesion(self, sh: shell.Shell):
+        with self._lock:
+            self.sesiones_activas -= 1
+            self.comandos += sum(len(v) for v in sh.latencias.values())
+
+    def iniciar(self):
+        """Arranca el servidor en un hilo de fondo."""
+        self._stdout_original = sys.stdout
+        sys.stdout = self.salida
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+
+    def servir(self):
+        """Arranca el servidor y bloquea hasta Ctrl+C."""
+        self.iniciar()
+        print(f"Servidor de shell escuchando en {self.direccion}")
+        try:
+            while self._thread.is_alive():
+                self._thread.join(0.5)
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.detener()
+
+    def detener(self):
+        self._server.shutdown()
+        self._server.server_close()
+        if self.unix_path and os.path.exists(self.unix_path):
+            os.unlink(self.unix_path)
+        if self._stdout_original is not None:
+            sys.stdout = self._stdout_original
+            self._stdout_original = None
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "sesiones_activas": self.sesiones_activas,
+                "sesiones_totales": self.sesiones_totales,
+                "comandos": self.comandos,
+            }
+
+
+class ClienteShell:
+    """Cliente mínimo del ServidorShell."""
+
+    def __init__(self, host: str = "127.0.0.1", puerto: int = PUERTO_DEFECTO,
+                 unix_path: Optional[str] = None, timeout: Optional[float] = None):
+        if unix_path:
+            self._sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            self._sock.settimeout(timeout)
+            self._sock.connect(unix_path)
+        else:
+            self._sock = socket.create_connection((host, puerto), timeout=timeout)
+        self._r = self._sock.makefile("rb")
+
+    def ejecutar(self, linea: str) -> str:
+        """Envía una línea y devuelve la salida del comando."""
+        self._sock.sendall((linea.replace("\n", " ") + "\n").encode("utf-8"))
+        partes = []
+        for raw in self._r:
+            texto = raw.decode("utf-8", "replace")
+            if texto.rstrip("\r\n") == FIN:
+                return "".join(partes)
+            partes.append(texto)
+        raise ConnectionError("El servidor cerró la conexión")
+
+    def cerrar(self):
+        try:
+            self._r.close()
+        finally:
+            self._sock.close()
+
+
+def generar_carga(sesiones: int, repeticiones: int, comando: str = "ls", host: str = "127.0.0.1",
+                  puerto: int = PUERTO_DEFECTO, unix_path: Optional[str] = None) -> Dict[str, float]:
+    """Abre `sesiones` clientes concurrentes; cada uno ejecuta `comando` `repeticiones` veces."""
+    latencias: List[float] = []
+    errores = [0]
+    lock = threading.Lock()
+    listos = threading.Barrier(sesiones + 1)
+
+    def trabajador():
+        propias = []
+        try:
+            cli = ClienteShell(host, puerto, unix_path)
+        except OSError:
+            with lock:
+                errores[0] += 1
+            listos.wait()
+            return
+        listos.wait()  # todas las sesiones abiertas antes de medir
+        try:
+            for _ in range(repeticiones):
+                t0 = time.perf_counter()
+                cli.ejecutar(comando)
+                propias.append(time.perf_counter() - t0)
+        except (ConnectionError, OSError):
+            with lock:
+                errores[0] += 1
+        finally:
+            cli.cerrar()
+            with lock:
+                latencias.extend(propias)
+
+    hilos = [threading.Thread(target=trabajador, daemon=True) for _ in range(sesiones)]
+    for h in hilos:
+        h.start()
+    listos.wait()
+    t0 = time.perf_counter()
+    for h in hilos:
+        h.join()
+    total = time.perf_counter() - t0
+    latencias.sort()
+    return {
+        "sesiones": sesiones,
+        "comandos": len(latencias),
+        "errores": errores[0],
+        "segundos": total,
+        "comandos_por_segundo": len(latencias) / total if total else 0.0,
+        "p50_ms": metricas.percentil(latencias, 0.50) * 1000,
+        "p95_ms": metricas.percentil(latencias, 0.95) * 1000,
+        "p99_ms": metricas.percentil(latencias, 0.99) * 1000,
+        "max_ms": (latencias[-1] if latencias else 0.0) * 1000,
+    }
+
+
+def _cliente_interactivo(cli: ClienteShell):
+    while True:
+        try:
+            linea = input("prototipoOS(remoto)> ")
+        except EOFError:
+            break
+        if not linea.strip():
+            continue
+        try:
+            print(cli.ejecutar(linea), end="")
+        except ConnectionError:
+            break
+    cli.cerrar()
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Cliente y generador de carga del servidor de shell")
+    parser.add_argument("modo", choices=["cliente", "carga"])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--puerto", type=int, default=PUERTO_DEFECTO)
+    parser.add_argument("--unix", metavar="RUTA", help="socket Unix en lugar de TCP")
+    parser.add_argument("-n", "--sesiones", type=int, default=10, help="sesiones concurrentes (carga)")
+    parser.add_argument("-r", "--repeticiones", type=int, default=100, help="comandos por sesión (carga)")
+    parser.add_argument("-c", "--comando", default="ls", help="comando a repetir (carga)")
+    args = parser.parse_args(argv)
+    if args.modo == "cliente":
+        _cliente_interactivo(ClienteShell(args.host, args.puerto, args.unix))
+    else:
+        r = generar_carga(args.sesiones, args.repeticiones, args.comando, args.host, args.puerto, args.unix)
+        for k, v in r.items():
+            print(f"{k:20} {v:.3f}" if isinstance(v, float) else f"{k:20} {v}")
+
+
+if __name__ == "__main__":
+    main()
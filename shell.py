@@ -3,28 +3,44 @@ Módulo: shell.py
 Responsabilidad: proporcionar una interfaz de línea de comandos simple para interactuar con el prototipo.
 Comandos soportados:
 - help
-- ls
+- ls [-l]
 - cat <archivo>
-- write <archivo> <contenido>
+- write [-c zlib|lzma|none] <archivo> <contenido>
 - rm <archivo>
 - formatear
 - run <nombre_proceso>
 - ps
 - kill <pid>
 - memstat
+- time <comando>
+- source <archivo>
+- stats [on|off|reset|dump <ruta> [json|prom]]
+- snapshot <ruta> / restore <ruta>
 - exit
 
 El shell usa los módulos archivos, procesos y memoria.
+Además del modo interactivo (start), run_script ejecuta líneas sin prompt (modo batch);
+con medir_latencias=True registra la latencia de cada comando (ver resumen_latencias).
+SalidaPorHilo permite capturar la salida de un comando por hilo (GUI, servidor).
 """
+import io
 import shlex
-from typing import List
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterable, List, Optional
 import archivos
+import instantanea
+import metricas
 import procesos
 import memoria
 
 
 class Shell:
-    def __init__(self, gestor: procesos.GestorProcesos, mem: memoria.Memoria):
+    # Límite de anidamiento de `source` (un script que se incluye a sí mismo)
+    MAX_SOURCE = 16
+
+    def __init__(self, gestor: procesos.GestorProcesos, mem: memoria.Memoria, medir_latencias: bool = False):
         self.gestor = gestor
         self.mem = mem
         self.prompt = "prototipoOS> "
@@ -40,30 +56,40 @@ class Shell:
             "ps": self.cmd_ps,
             "kill": self.cmd_kill,
             "memstat": self.cmd_memstat,
+            "time": self.cmd_time,
+            "source": self.cmd_source,
+            "stats": self.cmd_stats,
+            "snapshot": self.cmd_snapshot,
+            "restore": self.cmd_restore,
             "exit": self.cmd_exit,
         }
         # Diccionario con descripciones de cada comando (incluyendo alias en español)
         self.descriptions = {
             # Base
             "help": "Muestra la lista de comandos disponibles y su descripción.",
-            "ls": "Lista los archivos en el disco virtual.",
+            "ls": "Lista los archivos en el disco virtual. Uso: ls [-l]",
             "cat": "Muestra el contenido de un archivo. Uso: cat <archivo>",
-            "write": "Crea o sobrescribe un archivo. Uso: write <archivo> <contenido>",
+            "write": "Crea o sobrescribe un archivo. Uso: write [-c zlib|lzma|none] <archivo> <contenido>",
             "rm": "Elimina un archivo del disco virtual. Uso: rm <archivo>",
             "formatear": "Borra todos los archivos del disco virtual.",
             "run": "Crea y ejecuta un proceso de ejemplo. Uso: run <nombre_proceso>",
             "ps": "Muestra la lista de procesos en ejecución.",
             "kill": "Termina un proceso por su PID. Uso: kill <pid>",
             "memstat": "Muestra estadísticas de la memoria principal.",
+            "time": "Ejecuta un comando y muestra cuánto tardó. Uso: time <comando>",
+            "source": "Ejecuta los comandos de un archivo del disco virtual (uno por línea o separados por ';'). Uso: source <archivo>",
+            "stats": "Métricas internas (contadores, latencias). Uso: stats [on|off|reset|dump <ruta> [json|prom]]",
+            "snapshot": "Guarda memoria, procesos y disco en un archivo del sistema real. Uso: snapshot <ruta>",
+            "restore": "Restaura el estado guardado con snapshot. Uso: restore <ruta>",
             "exit": "Cierra el shell.",
 
             # Alias en español
             "ayuda": "Muestra la lista de comandos disponibles y su descripción.",
-            "listar": "Lista los archivos en el disco virtual.",
-            "lista": "Lista los archivos en el disco virtual.",
+            "listar": "Lista los archivos en el disco virtual. Uso: listar [-l]",
+            "lista": "Lista los archivos en el disco virtual. Uso: lista [-l]",
             "ver": "Muestra el contenido de un archivo. Uso: ver <archivo>",
             "mostrar": "Muestra el contenido de un archivo. Uso: mostrar <archivo>",
-            "escribir": "Crea o sobrescribe un archivo. Uso: escribir <archivo> <contenido>",
+            "escribir": "Crea o sobrescribe un archivo. Uso: escribir [-c zlib|lzma|none] <archivo> <contenido>",
             "borrar": "Elimina un archivo del disco virtual. Uso: borrar <archivo>",
             "eliminar": "Elimina un archivo del disco virtual. Uso: eliminar <archivo>",
             "ejecutar": "Crea y ejecuta un proceso de ejemplo. Uso: ejecutar <nombre_proceso>",
@@ -71,10 +97,18 @@ class Shell:
             "procesos": "Muestra la lista de procesos en ejecución.",
             "terminar": "Termina un proceso por su PID. Uso: terminar <pid>",
             "memoria": "Muestra estadísticas de la memoria principal.",
+            "tiempo": "Ejecuta un comando y muestra cuánto tardó. Uso: tiempo <comando>",
+            "estadisticas": "Métricas internas (contadores, latencias). Uso: estadisticas [on|off|reset|dump <ruta> [json|prom]]",
+            "guardar": "Guarda memoria, procesos y disco en un archivo del sistema real. Uso: guardar <ruta>",
+            "restaurar": "Restaura el estado guardado con guardar/snapshot. Uso: restaurar <ruta>",
             "salir": "Cierra el shell."
         }
 
         self._running = False
+        self._source_depth = 0
+        self.errores = 0
+        # comando -> latencias en segundos (None si no se miden)
+        self.latencias: Optional[Dict[str, List[float]]] = {} if medir_latencias else None
 
     def start(self):
         self._running = True
@@ -84,20 +118,74 @@ class Shell:
                 linea = input(self.prompt)
             except EOFError:
                 break
-            linea = linea.strip()
-            if not linea:
-                continue
+            # Igual que run_script: varios comandos por línea separados por ';'
+            for comando in _split_comandos(linea):
+                if not self._running:
+                    break
+                self.execute_line(comando)
+
+    def run_script(self, lineas: Iterable[str]) -> int:
+        """Ejecuta las líneas una tras otra, sin prompt. Devuelve el número de errores."""
+        self._running = True
+        errores_antes = self.errores
+        for linea in lineas:
+            if not self._running:
+                break
+            for comando in _split_comandos(linea):
+                self.execute_line(comando)
+        return self.errores - errores_antes
+
+    def execute_line(self, linea: str) -> bool:
+        """Ejecuta una línea de comando. Devuelve False si el comando no existe o falló."""
+        linea = linea.strip()
+        if not linea or linea.startswith("#"):
+            return True
+        try:
             parts = shlex.split(linea)
-            cmd = parts[0]
-            args = parts[1:]
-            func = self.commands.get(cmd)
-            if func:
-                try:
-                    func(args)
-                except Exception as e:
-                    print(f"Error ejecutando comando {cmd}: {e}")
-            else:
-                print(f"Comando no encontrado: {cmd}. Use 'help'.")
+        except ValueError as e:
+            print(f"Error de sintaxis: {e}")
+            self.errores += 1
+            return False
+        cmd = parts[0]
+        args = parts[1:]
+        func = self.commands.get(cmd)
+        if not func:
+            print(f"Comando no encontrado: {cmd}. Use 'help'.")
+            self.errores += 1
+            return False
+        t0 = time.perf_counter()
+        try:
+            func(args)
+        except Exception as e:
+            print(f"Error ejecutando comando {cmd}: {e}")
+            self.errores += 1
+            if metricas.activo:
+                metricas.incrementar("shell.errores")
+            return False
+        finally:
+            if self.latencias is not None or metricas.activo:
+                dt = time.perf_counter() - t0
+                if self.latencias is not None:
+                    self.latencias.setdefault(cmd, []).append(dt)
+                if metricas.activo:
+                    metricas.observar(f"shell.comando.{cmd}", dt)
+        return True
+
+    def resumen_latencias(self) -> str:
+        """Tabla con n, media, p50, p95 y máximo (ms) por comando."""
+        if not self.latencias:
+            return "Sin latencias registradas."
+        filas = [f"{'comando':12} {'n':>6} {'media':>9} {'p50':>9} {'p95':>9} {'max':>9}  (ms)"]
+        for cmd in sorted(self.latencias):
+            valores = sorted(self.latencias[cmd])
+            n = len(valores)
+            p50 = metricas.percentil(valores, 0.50)
+            p95 = metricas.percentil(valores, 0.95)
+            filas.append(
+                f"{cmd:12} {n:6} {sum(valores) / n * 1000:9.3f} {p50 * 1000:9.3f} "
+                f"{p95 * 1000:9.3f} {valores[-1] * 1000:9.3f}"
+            )
+        return "\n".join(filas)
 
     # Comandos
     def cmd_help(self, args: List[str]):
@@ -107,10 +195,22 @@ class Shell:
             print(f" - {cmd:10} {desc}")
 
     def cmd_ls(self, args: List[str]):
+        if "-l" in args:
+            for info in archivos.listar_archivos_detalle():
+                print(f"{info['tamano_almacenado']:>8} {info['tamano_logico']:>8} {info['codec']:5} {info['nombre']}")
+            self._resumen_compresion()
+            return
         archivos_lista = archivos.listar_archivos()
         for a in archivos_lista:
             print(a)
 
+    def _resumen_compresion(self):
+        """Pie de `ls -l`: ratio y tiempo de cada codec usado en esta sesión."""
+        for codec, st in sorted(archivos.estadisticas_compresion().items()):
+            print(f"{codec}: {st['archivos']} archivos, ratio {st['ratio']:.2f}, "
+                  f"compresión {st['tiempo_compresion'] * 1000:.2f} ms, "
+                  f"descompresión {st['tiempo_descompresion'] * 1000:.2f} ms ({st['descompresiones']})")
+
     def cmd_cat(self, args: List[str]):
         if not args:
             print("Uso: cat <archivo>")
@@ -122,12 +222,18 @@ class Shell:
             print(contenido)
 
     def cmd_write(self, args: List[str]):
+        codec = None
+        if len(args) >= 2 and args[0] == "-c":
+            codec = args[1]
+            args = args[2:]
         if len(args) < 2:
-            print("Uso: write <archivo> <contenido>")
+            print("Uso: write [-c zlib|lzma|none] <archivo> <contenido>")
             return
         nombre = args[0]
         contenido = " ".join(args[1:])
-        archivos.escribir_archivo(nombre, contenido)
+        usado = archivos.escribir_archivo(nombre, contenido, codec=codec)
+        if codec not in (None, "none") and usado == "none":
+            print(f"Nota: con {codec} no se reducía el tamaño; se guardó sin comprimir.")
         print("Escrito.")
 
     def cmd_rm(self, args: List[str]):
@@ -186,7 +292,7 @@ class Shell:
         except Exception:
             pass
         print("\nMarcos:")
-        owners = getattr(self.mem, "_owner", {})
+        owners = self.mem.frame_owners()
         for i in range(stats['frames_total']):
             owner = owners.get(i)
             if owner is None:
@@ -195,14 +301,129 @@ class Shell:
                 name = pid_map.get(owner, "?")
                 print(f" {i:3}: PID={owner} / {name}")
 
+    def cmd_time(self, args: List[str]):
+        if not args:
+            print("Uso: time <comando>")
+            return
+        t0 = time.perf_counter()
+        self.execute_line(shlex.join(args))
+        print(f"real {(time.perf_counter() - t0) * 1000:.3f} ms")
+
+    def cmd_source(self, args: List[str]):
+        if not args:
+            print("Uso: source <archivo>")
+            return
+        contenido = archivos.leer_archivo(args[0])
+        if contenido is None:
+            print("Archivo no encontrado")
+            return
+        if self._source_depth >= self.MAX_SOURCE:
+            print("Demasiados 'source' anidados.")
+            return
+        self._source_depth += 1
+        try:
+            for linea in contenido.splitlines():
+                for comando in _split_comandos(linea):
+                    self.execute_line(comando)
+        finally:
+            self._source_depth -= 1
+
+    def cmd_stats(self, args: List[str]):
+        if not args:
+            if not metricas.activo:
+                print("Métricas desactivadas. Use 'stats on'.")
+            print(metricas.resumen())
+        elif args[0] == "on":
+            metricas.habilitar(True)
+            print("Métricas activadas.")
+        elif args[0] == "off":
+            metricas.habilitar(False)
+            print("Métricas desactivadas.")
+        elif args[0] == "reset":
+            metricas.reiniciar()
+            print("Métricas reiniciadas.")
+        elif args[0] == "dump" and len(args) >= 2:
+            formato = args[2] if len(args) >= 3 else "json"
+            metricas.volcar(args[1], formato)
+            print(f"Métricas escritas en {args[1]} ({formato}).")
+        else:
+            print("Uso: stats [on|off|reset|dump <ruta> [json|prom]]")
+
+    def cmd_snapshot(self, args: List[str]):
+        if not args:
+            print("Uso: snapshot <ruta>")
+            return
+        r = instantanea.guardar(args[0], self.gestor, self.mem)
+        print(f"Instantánea escrita en {args[0]}: {r['bytes']} bytes, {r['marcos']} marcos, "
+              f"{r['procesos']} procesos ({r['segundos'] * 1000:.2f} ms)")
+        if r["omitidos"]:
+            print(f"Procesos no guardados (no serializables o bloqueados): {r['omitidos']}")
+
+    def cmd_restore(self, args: List[str]):
+        if not args:
+            print("Uso: restore <ruta>")
+            return
+        r = instantanea.restaurar(args[0], self.gestor, self.mem)
+        print(f"Estado restaurado desde {args[0]}: {r['procesos']} procesos, {r['marcos']} marcos, "
+              f"{r['archivos']} archivos ({r['segundos'] * 1000:.2f} ms)")
+
     def cmd_exit(self, args: List[str]):
         print("Saliendo del shell...")
         self._running = False
 
 
+class SalidaPorHilo(io.TextIOBase):
+    """Reemplazo de sys.stdout que escribe en el buffer del hilo actual, si lo hay.
+
+    Se instala una sola vez (sys.stdout = SalidaPorHilo(destino)); capturar() redirige solo
+    la salida del hilo que lo llama, a diferencia de redirect_stdout, que afecta a todos.
+    """
+
+    def __init__(self, real):
+        self._real = real
+        self._local = threading.local()
+
+    def _destino(self):
+        buf = getattr(self._local, "buffer", None)
+        return self._real if buf is None else buf
+
+    def write(self, s):
+        return self._destino().write(s)
+
+    def flush(self):
+        self._destino().flush()
+
+    @contextmanager
+    def capturar(self):
+        buf = io.StringIO()
+        self._local.buffer = buf
+        try:
+            yield buf
+        finally:
+            self._local.buffer = None
+
+
+def _split_comandos(linea: str) -> List[str]:
+    """Separa una línea por ';' que no estén entre comillas."""
+    comandos, actual, comilla = [], [], None
+    for ch in linea:
+        if comilla:
+            if ch == comilla:
+                comilla = None
+        elif ch in "'\"":
+            comilla = ch
+        elif ch == ";":
+            comandos.append("".join(actual))
+            actual = []
+            continue
+        actual.append(ch)
+    comandos.append("".join(actual))
+    return comandos
+
+
 if __name__ == "__main__":
-    g = procesos.GestorProcesos(quantum=1)
     m = memoria.Memoria(frames=16, frame_size=128)
+    g = procesos.GestorProcesos(m, quantum=1)
     g.iniciar()
     try:
         Shell(g, m).start()
@@ -3,11 +3,28 @@ Módulo: sincronizacion.py
 Contiene:
 - Clase Semaforo
 - Clase Mutex (basado en threading.Lock)
+- Clase LockLectoresEscritores (varios lectores o un escritor, con contador de contención)
 
 Estas primitivas usan las implementaciones de `threading` de Python pero ofrecen una API simple.
+
+Primitivas integradas con el planificador (para procesos simulados de `procesos.py`):
+- SemaforoProc, MutexProc, CondicionProc, LectoresEscritoresProc, BarreraProc
+- DetectorInterbloqueo (grafo de espera sobre esas primitivas)
+
+Sus operaciones reciben el `Proceso` y se pueden usar directamente como instrucciones, p. ej.
+`[mutex.acquire, imprimir, mutex.release]`. Si la operación no puede continuar, el proceso pasa a
+"bloqueado" en la cola de espera de la primitiva (el hilo del scheduler sigue con otros procesos);
+la operación que lo libera lo devuelve a la cola de listos del GestorProcesos. Cada primitiva lleva
+adquisiciones, contenciones y un histograma del tiempo de espera (ver estadisticas_primitivas()).
 """
 import threading
 import time
+import weakref
+from collections import deque
+from contextlib import contextmanager
+from typing import Deque, Dict, List, Optional, Tuple
+
+from metricas import Histograma
 
 class Mutex:
     def __init__(self):
@@ -40,7 +57,586 @@ class Semaforo:
         self._sem.release()
 
 
+class LockLectoresEscritores:
+    """Lock lectores/escritores con preferencia de escritores.
+
+    Varios lectores pueden tener el lock a la vez; un escritor lo tiene en exclusiva.
+    Cuando hay un escritor esperando, los lectores nuevos esperan (evita inanición del escritor).
+    Lleva contadores de adquisiciones y de esperas (contención) para medir el efecto del lock.
+    """
+
+    def __init__(self):
+        self._cond = threading.Condition(threading.Lock())
+        self._lectores = 0
+        self._escritor = False
+        self._escritores_esperando = 0
+        self.adquisiciones_lectura = 0
+        self.adquisiciones_escritura = 0
+        self.esperas_lectura = 0
+        self.esperas_escritura = 0
+
+    def acquire_read(self):
+        with self._cond:
+            if self._escritor or self._escritores_esperando:
+                self.esperas_lectura += 1
+                while self._escritor or self._escritores_esperando:
+                    self._cond.wait()
+            self._lectores += 1
+            self.adquisiciones_lectura += 1
+
+    def release_read(self):
+        with self._cond:
+            self._lectores -= 1
+            if self._lectores == 0:
+                self._cond.notify_all()
+
+    def acquire_write(self):
+        with self._cond:
+            if self._escritor or self._lectores:
+                self.esperas_escritura += 1
+                self._escritores_esperando += 1
+                try:
+                    while self._escritor or self._lectores:
+                        self._cond.wait()
+                finally:
+                    self._escritores_esperando -= 1
+            self._escritor = True
+            self.adquisiciones_escritura += 1
+
+    def release_write(self):
+        with self._cond:
+            self._escritor = False
+            self._cond.notify_all()
+
+    @contextmanager
+    def lectura(self):
+        self.acquire_read()
+        try:
+            yield
+        finally:
+            self.release_read()
+
+    @contextmanager
+    def escritura(self):
+        self.acquire_write()
+        try:
+            yield
+        finally:
+            self.release_write()
+
+    def stats(self) -> Dict[str, int]:
+        """Devuelve contadores de adquisiciones y esperas."""
+        with self._cond:
+            return {
+                "adquisiciones_lectura": self.adquisiciones_lectura,
+                "adquisiciones_escritura": self.adquisiciones_escritura,
+                "esperas_lectura": self.esperas_lectura,
+                "esperas_escritura": self.esperas_escritura,
+            }
+
+
+# Registro de primitivas vivas para estadisticas_primitivas()
+_primitivas = weakref.WeakSet()
+
+
+class _PrimitivaProc:
+    """Base de las primitivas integradas con GestorProcesos.
+
+    El estado de la primitiva se protege con `gestor.lock`, el mismo lock del scheduler,
+    así que bloquear/despertar un proceso y tocar las colas del gestor es atómico.
+    Cada primitiva sabe qué procesos la tienen tomada (_tenedores); eso alimenta el grafo
+    de espera del DetectorInterbloqueo y permite liberarla si el proceso termina.
+    """
+
+    tipo = "primitiva"
+
+    def __init__(self, gestor, nombre: Optional[str] = None):
+        self.gestor = gestor
+        self.nombre = nombre or f"{self.tipo}-{id(self):x}"
+        self.adquisiciones = 0
+        self.contenciones = 0
+        self.espera = Histograma()
+        # pid -> [proceso, unidades tomadas]
+        self._tenedores: Dict[int, list] = {}
+        _primitivas.add(self)
+
+    def _bloquear(self, proceso, cola: Deque):
+        cola.append((proceso, time.monotonic()))
+        self.contenciones += 1
+        self.gestor.bloquear(proceso, self)
+        detector = getattr(self.gestor, "detector_interbloqueo", None)
+        if detector is not None and detector.al_bloquear:
+            detector.verificar(proceso)
+
+    def _despertar(self, entrada: Tuple):
+        proceso, t0 = entrada
+        self.espera.observar(time.monotonic() - t0)
+        self.gestor.desbloquear(proceso)
+
+    def _tomar(self, proceso):
+        t = self._tenedores.get(proceso.pid)
+        if t is None:
+            self._tenedores[proceso.pid] = [proceso, 1]
+            proceso.metadata.setdefault("recursos", set()).add(self)
+        else:
+            t[1] += 1
+
+    def _soltar(self, pid: int):
+        t = self._tenedores.get(pid)
+        if t is None:
+            return
+        t[1] -= 1
+        if t[1] <= 0:
+            del self._tenedores[pid]
+            t[0].metadata.get("recursos", set()).discard(self)
+
+    def _duenos(self) -> List:
+        """Procesos que tienen tomada la primitiva (aristas del grafo de espera)."""
+        return [t[0] for t in self._tenedores.values()]
+
+    def _colas(self) -> List[Deque]:
+        return []
+
+    def _cancelar(self, proceso):
+        """Quita al proceso de las colas de espera (lo llama GestorProcesos al terminarlo)."""
+        with self.gestor.lock:
+            for cola in self._colas():
+                for entrada in list(cola):
+                    if entrada[0] is proceso:
+                        cola.remove(entrada)
+
+    def _liberar(self, proceso):
+        """Suelta lo que el proceso tenga tomado (lo llama GestorProcesos al terminarlo)."""
+
+    def stats(self) -> Dict:
+        with self.gestor.lock:
+            return {
+                "nombre": self.nombre,
+                "tipo": self.tipo,
+                "adquisiciones": self.adquisiciones,
+                "contenciones": self.contenciones,
+                "esperando": sum(len(c) for c in self._colas()),
+                "tenedores": sorted(self._tenedores),
+                "espera": self.espera.as_dict(),
+            }
+
+
+class SemaforoProc(_PrimitivaProc):
+    """Semáforo contador: down (P) bloquea el proceso si el valor es 0; up (V) lo despierta.
+
+    Por defecto no tiene dueños: el que hace up no tiene por qué ser el que hizo down
+    (productor/consumidor), así que no aporta aristas al grafo de espera. Con con_duenos=True
+    cada down cuenta como unidad tomada por el proceso (semáforo usado como recurso): entra en
+    la detección de interbloqueos y, si el proceso termina, sus unidades se devuelven con up.
+    """
+
+    tipo = "semaforo"
+
+    def __init__(self, gestor, value: int = 1, nombre: Optional[str] = None, con_duenos: bool = False):
+        super().__init__(gestor, nombre)
+        self.value = value
+        self.con_duenos = con_duenos
+        self._esperando: Deque = deque()
+
+    def _colas(self):
+        return [self._esperando]
+
+    def down(self, proceso):
+        with self.gestor.lock:
+            if self.value > 0:
+                self.value -= 1
+                self.adquisiciones += 1
+                if self.con_duenos:
+                    self._tomar(proceso)
+            else:
+                self._bloquear(proceso, self._esperando)
+
+    def up(self, proceso=None):
+        with self.gestor.lock:
+            if proceso is not None and self.con_duenos:
+                self._soltar(proceso.pid)
+            if self._esperando:
+                # Se entrega la unidad directamente al proceso despertado
+                entrada = self._esperando.popleft()
+                self.adquisiciones += 1
+                if self.con_duenos:
+                    self._tomar(entrada[0])
+                self._despertar(entrada)
+            else:
+                self.value += 1
+
+    def _liberar(self, proceso):
+        if not self.con_duenos:
+            return  # sin dueños no se sabe qué unidades siguen en uso
+        with self.gestor.lock:
+            t = self._tenedores.get(proceso.pid)
+            for _ in range(t[1] if t else 0):
+                self.up(proceso)
+
+
+class MutexProc(_PrimitivaProc):
+    """Mutex con dueño (PID). release entrega el mutex al siguiente proceso en espera."""
+
+    tipo = "mutex"
+
+    def __init__(self, gestor, nombre: Optional[str] = None):
+        super().__init__(gestor, nombre)
+        self.owner: Optional[int] = None
+        self._esperando: Deque = deque()
+
+    def _colas(self):
+        return [self._esperando]
+
+    def acquire(self, proceso):
+        with self.gestor.lock:
+            if self.owner == proceso.pid:
+                raise RuntimeError(f"{self.nombre}: el proceso {proceso.pid} ya tiene el mutex")
+            if self.owner is None:
+                self._asignar(proceso)
+            else:
+                self._bloquear(proceso, self._esperando)
+
+    def release(self, proceso):
+        with self.gestor.lock:
+            if self.owner != proceso.pid:
+                raise RuntimeError(f"{self.nombre}: el proceso {proceso.pid} no tiene el mutex")
+            self._entregar()
+
+    def _asignar(self, proceso):
+        self.owner = proceso.pid
+        self.adquisiciones += 1
+        self._tomar(proceso)
+
+    def _entregar(self):
+        if self.owner is not None:
+            self._soltar(self.owner)
+        if self._esperando:
+            entrada = self._esperando.popleft()
+            self._asignar(entrada[0])
+            self._despertar(entrada)
+        else:
+            self.owner = None
+
+    def _encolar_despierto(self, entrada: Tuple):
+        """Usado por CondicionProc: el proceso señalado debe readquirir el mutex."""
+        if self.owner is None:
+            self._asignar(entrada[0])
+            self._despertar(entrada)
+        else:
+            self.contenciones += 1
+            self._esperando.append((entrada[0], time.monotonic()))
+            entrada[0].metadata["bloqueado_en"] = self
+
+    def _liberar(self, proceso):
+        with self.gestor.lock:
+            if self.owner == proceso.pid:
+                self._entregar()
+
+
+class CondicionProc(_PrimitivaProc):
+    """Variable de condición (semántica Mesa) asociada a un MutexProc."""
+
+    tipo = "condicion"
+
+    def __init__(self, gestor, mutex: MutexProc, nombre: Optional[str] = None):
+        super().__init__(gestor, nombre)
+        self.mutex = mutex
+        self._esperando: Deque = deque()
+
+    def _colas(self):
+        return [self._esperando]
+
+    def wait(self, proceso):
+        """Libera el mutex y bloquea; al despertar el proceso vuelve a tener el mutex."""
+        with self.gestor.lock:
+            if self.mutex.owner != proceso.pid:
+                raise RuntimeError(f"{self.nombre}: wait sin tener {self.mutex.nombre}")
+            self.mutex._entregar()
+            self._bloquear(proceso, self._esperando)
+
+    def signal(self, proceso=None):
+        with self.gestor.lock:
+            if self._esperando:
+                self._pasar_a_mutex(self._esperando.popleft())
+
+    def broadcast(self, proceso=None):
+        with self.gestor.lock:
+            while self._esperando:
+                self._pasar_a_mutex(self._esperando.popleft())
+
+    def _pasar_a_mutex(self, entrada: Tuple):
+        proceso, t0 = entrada
+        self.adquisiciones += 1
+        self.espera.observar(time.monotonic() - t0)
+        self.mutex._encolar_despierto((proceso, time.monotonic()))
+
+
+class LectoresEscritoresProc(_PrimitivaProc):
+    """Lock lectores/escritores para procesos, con preferencia de escritores."""
+
+    tipo = "rwlock"
+
+    def __init__(self, gestor, nombre: Optional[str] = None):
+        super().__init__(gestor, nombre)
+        self.lectores = 0
+        self.escritor: Optional[int] = None
+        self._lectores_esperando: Deque = deque()
+        self._escritores_esperando: Deque = deque()
+
+    def _colas(self):
+        return [self._lectores_esperando, self._escritores_esperando]
+
+    def acquire_read(self, proceso):
+        with self.gestor.lock:
+            if self.escritor is None and not self._escritores_esperando:
+                self._leer(proceso)
+            else:
+                self._bloquear(proceso, self._lectores_esperando)
+
+    def release_read(self, proceso):
+        with self.gestor.lock:
+            if self.lectores <= 0:
+                raise RuntimeError(f"{self.nombre}: release_read sin lectores")
+            self.lectores -= 1
+            self._soltar(proceso.pid)
+            if self.lectores == 0:
+                self._entregar()
+
+    def acquire_write(self, proceso):
+        with self.gestor.lock:
+            if self.escritor is None and self.lectores == 0:
+                self._escribir(proceso)
+            else:
+                self._bloquear(proceso, self._escritores_esperando)
+
+    def release_write(self, proceso):
+        with self.gestor.lock:
+            if self.escritor != proceso.pid:
+                raise RuntimeError(f"{self.nombre}: el proceso {proceso.pid} no es el escritor")
+            self.escritor = None
+            self._soltar(proceso.pid)
+            self._entregar()
+
+    def _leer(self, proceso):
+        self.lectores += 1
+        self.adquisiciones += 1
+        self._tomar(proceso)
+
+    def _escribir(self, proceso):
+        self.escritor = proceso.pid
+        self.adquisiciones += 1
+        self._tomar(proceso)
+
+    def _entregar(self):
+        if self._escritores_esperando:
+            entrada = self._escritores_esperando.popleft()
+            self._escribir(entrada[0])
+            self._despertar(entrada)
+            return
+        while self._lectores_esperando:
+            entrada = self._lectores_esperando.popleft()
+            self._leer(entrada[0])
+            self._despertar(entrada)
+
+    def _liberar(self, proceso):
+        with self.gestor.lock:
+            if self.escritor == proceso.pid:
+                self.release_write(proceso)
+            while proceso.pid in self._tenedores:
+                self.release_read(proceso)
+
+
+class BarreraProc(_PrimitivaProc):
+    """Barrera para `partes` procesos: el último en llegar despierta a los demás."""
+
+    tipo = "barrera"
+
+    def __init__(self, gestor, partes: int, nombre: Optional[str] = None):
+        super().__init__(gestor, nombre)
+        self.partes = partes
+        self._esperando: Deque = deque()
+
+    def _colas(self):
+        return [self._esperando]
+
+    def wait(self, proceso):
+        with self.gestor.lock:
+            self.adquisiciones += 1
+            if len(self._esperando) + 1 >= self.partes:
+                while self._esperando:
+                    self._despertar(self._esperando.popleft())
+            else:
+                self._bloquear(proceso, self._esperando)
+
+
+class DetectorInterbloqueo:
+    """Detección de interbloqueos sobre el grafo de espera de las primitivas *Proc.
+
+    El grafo no se guarda aparte: las aristas salen del estado que ya existe
+    (proceso -> primitiva en `metadata['bloqueado_en']`, primitiva -> procesos en `_tenedores`).
+    Un ciclo nuevo solo puede pasar por la arista recién añadida, así que cada bloqueo
+    recorre únicamente lo alcanzable desde ese proceso: con mutex (un dueño, una espera por
+    proceso) es una cadena corta, O(1) en el caso común.
+
+    Con primitivas de varios tenedores (semáforos con dueños, lectores) un proceso solo cuenta
+    como atascado si *todos* los tenedores lo están. Esperas sin tenedores (barreras,
+    condiciones, semáforos sin con_duenos) no se consideran interbloqueo.
+
+    politica: None (solo informa) o "matar_mas_joven" (termina el PID más alto del ciclo).
+    al_bloquear: verificar en cada adquisición bloqueante; si es False, usar iniciar().
+    """
+
+    POLITICAS = (None, "matar_mas_joven")
+
+    def __init__(self, gestor, politica: Optional[str] = None, al_bloquear: bool = True):
+        if politica not in self.POLITICAS:
+            raise ValueError(f"Política desconocida: {politica}")
+        self.gestor = gestor
+        self.politica = politica
+        self.al_bloquear = al_bloquear
+        self.interbloqueos: List[Dict] = []
+        self.verificaciones = 0
+        self.tiempo_verificacion = 0.0
+        self._reportados = set()
+        self._running = False
+        self._thread: Optional[threading.Thread] = None
+        gestor.detector_interbloqueo = self
+
+    def verificar(self, proceso) -> Optional[Dict]:
+        """Busca un interbloqueo que incluya a `proceso`. Devuelve el reporte o None.
+
+        Si `proceso` solo espera a procesos que están en un ciclo (sin formar parte de él),
+        se informa el ciclo, no el camino completo.
+        """
+        t0 = time.perf_counter()
+        with self.gestor.lock:
+            ciclos: List[List[Tuple]] = []
+            atascado = self._atascado(proceso, [], {}, ciclos)
+            self.verificaciones += 1
+            self.tiempo_verificacion += time.perf_counter() - t0
+            if not atascado:
+                return None
+            for ciclo in ciclos:
+                clave = frozenset(p.pid for p, _ in ciclo)
+                if clave not in self._reportados:
+                    break
+            else:
+                return None
+            self._reportados.add(clave)
+            pids = [p.pid for p, _ in ciclo]
+            reporte = {
+                "pids": pids,
+                "recursos": [prim.nombre for _, prim in ciclo],
+                "victima": None,
+            }
+            texto = "".join(f"P{p.pid} -[{prim.nombre}]-> " for p, prim in ciclo) + f"P{pids[0]}"
+            print(f"[Interbloqueo] {texto}")
+            if self.politica == "matar_mas_joven":
+                victima = max(pids)
+                reporte["victima"] = victima
+                print(f"[Interbloqueo] Recuperación: se termina PID {victima}")
+                self.gestor.terminar_proceso(victima)
+                self._reportados.discard(clave)
+            self.interbloqueos.append(reporte)
+            return reporte
+
+    def _atascado(self, proceso, camino: List[Tuple], indices: Dict[int, int],
+                  ciclos: List[List[Tuple]]) -> bool:
+        """True si `proceso` no puede avanzar suponiendo atascado el camino actual.
+
+        camino: (proceso, primitiva que espera) desde el origen; indices: pid -> posición.
+        Cada vez que el recorrido vuelve a un pid del camino se guarda en `ciclos` el tramo
+        desde ese pid. Al retroceder se deshace todo lo que agregó la rama.
+        """
+        i = indices.get(proceso.pid)
+        if i is not None:
+            ciclos.append(camino[i:])
+            return True
+        prim = proceso.metadata.get("bloqueado_en")
+        if prim is None or proceso.estado != "bloqueado":
+            return False
+        duenos = prim._duenos()
+        if not duenos:
+            return False
+        n_ciclos = len(ciclos)
+        indices[proceso.pid] = len(camino)
+        camino.append((proceso, prim))
+        # Un solo tenedor libre desmiente la suposición
+        atascado = all(self._atascado(d, camino, indices, ciclos) for d in duenos)
+        camino.pop()
+        del indices[proceso.pid]
+        if not atascado:
+            del ciclos[n_ciclos:]
+        return atascado
+
+    def verificar_todos(self) -> List[Dict]:
+        """Verificación completa sobre todos los procesos bloqueados."""
+        with self.gestor.lock:
+            bloqueados = [p for p in self.gestor._all_procesos.values() if p.estado == "bloqueado"]
+        reportes = []
+        for p in bloqueados:
+            r = self.verificar(p)
+            if r:
+                reportes.append(r)
+        return reportes
+
+    def iniciar(self, intervalo: float = 1.0):
+        """Verificador periódico en segundo plano (alternativa a al_bloquear)."""
+        if self._running:
+            return
+        self._running = True
+
+        def loop():
+            while self._running:
+                self.verificar_todos()
+                time.sleep(intervalo)
+        self._thread = threading.Thread(target=loop, daemon=True)
+        self._thread.start()
+
+    def detener(self):
+        self._running = False
+        if self._thread:
+            self._thread.join(timeout=1)
+
+    def stats(self) -> Dict:
+        with self.gestor.lock:
+            return {
+                "verificaciones": self.verificaciones,
+                "tiempo_verificacion": self.tiempo_verificacion,
+                "interbloqueos": len(self.interbloqueos),
+            }
+
+
+def estadisticas_primitivas() -> List[Dict]:
+    """Estadísticas de todas las primitivas vivas, de mayor a menor tiempo total de espera."""
+    stats = [p.stats() for p in list(_primitivas)]
+    stats.sort(key=lambda s: s["espera"]["suma"], reverse=True)
+    return stats
+
+
 if __name__ == "__main__":
     s = Semaforo(2)
     print(s.down(0.01))
-    s.up()
\ No newline at end of file
+    s.up()
+
+    # Dos procesos compitiendo por un MutexProc
+    from memoria import Memoria
+    from procesos import GestorProcesos, instruccion_imprimir_factory
+    g = GestorProcesos(Memoria(frames=16), quantum=2)
+    m = MutexProc(g, nombre="mutex-demo")
+    prog = [m.acquire, instruccion_imprimir_factory("en sección crítica"), m.release]
+    g.crear_proceso("A", list(prog))
+    g.crear_proceso("B", list(prog))
+    for _ in range(6):
+        g._schedule_once()
+    print(estadisticas_primitivas())
+
+    # Interbloqueo clásico: C toma m1 y espera m2, D toma m2 y espera m1
+    DetectorInterbloqueo(g, politica="matar_mas_joven")
+    g.quantum = 1
+    m1, m2 = MutexProc(g, nombre="m1"), MutexProc(g, nombre="m2")
+    g.crear_proceso("C", [m1.acquire, m2.acquire, m2.release, m1.release])
+    g.crear_proceso("D", [m2.acquire, m1.acquire, m1.release, m2.release])
+    for _ in range(6):
+        g._schedule_once()
+    print(g.detector_interbloqueo.interbloqueos)
\ No newline at end of file